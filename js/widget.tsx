@@ -1,5 +1,5 @@
 import * as React from "react";
-import { createRender, useModelState } from "@anywidget/react";
+import { createRender, useModel, useModelState } from "@anywidget/react";
 import "./widget.css";
 
 const SequenceComponent = ({ c, participantSequencesCount, max, sum }: { c: any, participantSequencesCount: { [key: string]: number }, max: number, sum: number }) => {
@@ -84,8 +84,84 @@ const Sequence = ({ d, participantSequences }: { d: any, participantSequences: a
   </div>);
 };
 
+// Applies the JSON patch operations sent by Widget.update_study to a copy of the config.
+const applyConfigPatch = (config: any, patch: any[]) => {
+  let result = structuredClone(config);
+  patch.forEach(({ op, path, value }: { op: string, path: string, value?: any }) => {
+    if (path === "") {
+      result = value;
+      return;
+    }
+    const keys = path.slice(1).split("/").map((key) => key.replace(/~1/g, "/").replace(/~0/g, "~"));
+    const last = keys.pop() as string;
+    const parent = keys.reduce((node, key) => node[key], result);
+    if (Array.isArray(parent)) {
+      const index = last === "-" ? parent.length : Number(last);
+      if (op === "remove") {
+        parent.splice(index, 1);
+      } else if (op === "add") {
+        parent.splice(index, 0, value);
+      } else {
+        parent[index] = value;
+      }
+    } else if (op === "remove") {
+      delete parent[last];
+    } else {
+      parent[last] = value;
+    }
+  });
+  return result;
+};
+
+// The config shown by each widget. Patches are applied here instead of to the
+// synced "config" trait, since a changed trait would be uploaded back to the
+// kernel in full by the next save_changes().
+type ConfigStore = { config: any, listeners: Set<() => void> };
+const configStores = new WeakMap<any, ConfigStore>();
+
+const getConfigStore = (model: any): ConfigStore => {
+  let store = configStores.get(model);
+  if (!store) {
+    store = { config: model.get("config"), listeners: new Set() };
+    configStores.set(model, store);
+  }
+  return store;
+};
+
+const setStoreConfig = (store: ConfigStore, config: any) => {
+  store.config = config;
+  store.listeners.forEach((listener) => listener());
+};
+
+const initialize = ({ model }: { model: any }) => {
+  const store = getConfigStore(model);
+  const onMessage = (msg: any) => {
+    if (msg?.type === "revisitWidget/CONFIG_PATCH") {
+      // The kernel already holds the patched config
+      setStoreConfig(store, applyConfigPatch(store.config, msg.patch));
+    }
+  };
+  // A full config sent by the kernel replaces the patched one
+  const onChange = () => setStoreConfig(store, model.get("config"));
+  model.on("msg:custom", onMessage);
+  model.on("change:config", onChange);
+  return () => {
+    model.off("msg:custom", onMessage);
+    model.off("change:config", onChange);
+  };
+};
+
+const useConfig = () => {
+  const store = getConfigStore(useModel());
+  const subscribe = React.useCallback((listener: () => void) => {
+    store.listeners.add(listener);
+    return () => { store.listeners.delete(listener); };
+  }, [store]);
+  return React.useSyncExternalStore(subscribe, () => store.config);
+};
+
 const render = createRender(() => {
-  const [config] = useModelState<any>("config");
+  const config = useConfig();
   const [iframeReady, setIframeReady] = React.useState(0);
   const [page, setPage] = React.useState("study");
   const [sequences, setSequence] = useModelState<any>("sequence");
@@ -141,4 +217,4 @@ const render = createRender(() => {
   );
 });
 
-export default { render };
+export default { initialize, render };
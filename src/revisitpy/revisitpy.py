@@ -1,8 +1,9 @@
 from __future__ import annotations
 import json
 from . import models as rvt_models
-from pydantic import BaseModel, ValidationError  # type: ignore
-from typing import List, Literal, get_origin, Optional, get_args, Any, Unpack, overload, get_type_hints
+from pydantic import BaseModel, RootModel, ValidationError, TypeAdapter, Discriminator, Tag, PrivateAttr  # type: ignore
+from pydantic_core import to_json
+from typing import List, Dict, Iterator, Literal, get_origin, Optional, get_args, Any, Unpack, overload, get_type_hints, Annotated, Union
 from enum import Enum
 import csv
 from dataclasses import make_dataclass, asdict
@@ -11,16 +12,29 @@ import os
 import shutil
 from . import widget as _widget
 import inspect
+import functools
+import itertools
+import math
+import collections
+import hashlib
+import concurrent.futures
+import gzip
+import copy
+import sys
+import time
+import pandas as pd
 
 
 __all__ = [
     "component",
+    "component_batch",
     "sequence",
     "response",
     "uiConfig",
     "studyMetadata",
     "studyConfig",
     "data",
+    "data_iter",
     "widget",
     "answer",
 ]
@@ -28,13 +42,15 @@ __all__ = [
 
 class _JSONableBaseModel(BaseModel):
     def __str__(self):
-        return json.dumps(
-            json.loads(
-                self.root.model_dump_json(
-                    exclude_none=True, by_alias=True
-                )),
-            indent=4
-        )
+        return self.to_json(indent=4)
+
+    def to_dict(self) -> dict:
+        """Returns the configuration of the underlying model as a JSON-compatible dictionary."""
+        return self.root.model_dump(mode='json', exclude_none=True, by_alias=True)
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """Returns the configuration of the underlying model as a JSON string."""
+        return self.root.model_dump_json(exclude_none=True, by_alias=True, indent=indent)
 
 
 # Private
@@ -83,18 +99,41 @@ class _WrappedComponent(_JSONableBaseModel):
     base__: Optional[_WrappedComponent] = None
     context__: Optional[dict] = None
     metadata__: Optional[dict] = None
+    # Fields set on this component when it was created with "overlay" inheritance.
+    # All other fields are shared with base__.
+    overrides__: Optional[List[str]] = None
     root: rvt_models.IndividualComponent
+    # Field name -> (list, length, {id: position}) for response and correctAnswer lookups
+    _id_indexes: Dict[str, tuple] = PrivateAttr(default_factory=dict)
+    # Fields whose containers are shared with overlay components derived from this one
+    _shared_fields: set = PrivateAttr(default_factory=set)
 
     def model_post_init(self, __context: Any) -> None:
         # Sets the root to be the instantiation of the individual response type instead
         # of the union response type
         self.root = self.root.root
 
+    def _detach(self, field: str) -> None:
+        # Overlay components share containers with their base until either of them
+        # is edited, so edits on one never show up in the other
+        if self.overrides__ is not None and field not in self.overrides__:
+            self.overrides__.append(field)
+        elif field not in self._shared_fields:
+            return
+        setattr(self.root, field, copy.copy(getattr(self.root, field)))
+        self._shared_fields.discard(field)
+
+    def _share(self) -> None:
+        # Called when overlay components start sharing this component's lists
+        self._shared_fields.update(['response', 'correctAnswer'])
+
     def responses(self, responses: List[_WrappedResponse]) -> _WrappedComponent:
         for item in responses:
             if not isinstance(item, _WrappedResponse):
                 raise RevisitError(message=f"Expecting type Response but got {type(item)}")
         self.root.response = responses
+        if self.overrides__ is not None and 'response' not in self.overrides__:
+            self.overrides__.append('response')
         return self
 
     def correct_answers(self, answers: List[_WrappedAnswer]) -> _WrappedComponent:
@@ -102,6 +141,8 @@ class _WrappedComponent(_JSONableBaseModel):
             if not isinstance(item, _WrappedAnswer):
                 raise RevisitError(message=f"Expecting type Answer but got {type(item)}")
         self.root.correctAnswer = answers
+        if self.overrides__ is not None and 'correctAnswer' not in self.overrides__:
+            self.overrides__.append('correctAnswer')
         return self
 
     def get(self, param):
@@ -113,29 +154,46 @@ class _WrappedComponent(_JSONableBaseModel):
         else:
             return getattr(self.root, param)
 
+    def _find_position(self, field: str, id: str) -> Optional[int]:
+        items = getattr(self.root, field) or []
+        cached = self._id_indexes.get(field)
+        if cached is not None and cached[0] is items and cached[1] == len(items):
+            position = cached[2].get(id)
+            if position is not None and _get_item_id(items[position]) == id:
+                return position
+
+        # Index is missing, the list changed since it was built or an item was renamed
+        positions = {}
+        for position, item in enumerate(items):
+            positions.setdefault(_get_item_id(item), position)
+        self._id_indexes[field] = (items, len(items), positions)
+        return positions.get(id)
+
     def get_response(self, id: str) -> _WrappedResponse | None:
-        for response in self.root.response:
-            if response.root.id == id:
-                return response
-        return None
+        position = self._find_position('response', id)
+        if position is None:
+            return None
+        return self.root.response[position]
 
     def edit_response(self, id: str, **kwargs) -> _WrappedComponent:
-        for r in self.root.response:
-            if r.root.id == id:
-                # Get dict
-                response_dict = r.root.__dict__
-                # Create new response
-                new_response = __response__(**response_dict)
-                # Set with new values
-                new_response.set(**kwargs)
-                # Filter out old response
-                self.root.response = [_r for _r in self.root.response if _r.root.id != id]
-                # Add new response
-                self.root.response.append(new_response)
-                # Return component
-                return self
-
-        raise ValueError('No response with given ID found.')
+        return self.edit_responses({id: kwargs})
+
+    def edit_responses(self, edits: dict) -> _WrappedComponent:
+        positions = {}
+        for id in edits:
+            position = self._find_position('response', id)
+            if position is None:
+                raise ValueError(f'No response with ID "{id}" found.')
+            positions[id] = position
+
+        self._detach('response')
+        for id, kwargs in edits.items():
+            # Replace in place with a new response to keep the original order
+            current = self.root.response[positions[id]].root
+            self.root.response[positions[id]] = _edited_response(current, kwargs)
+            if 'id' in kwargs:
+                self._id_indexes.pop('response', None)
+        return self
 
     def response_context(self, **kwargs):
         self.context__ = kwargs
@@ -151,28 +209,23 @@ class _WrappedComponent(_JSONableBaseModel):
         return self
 
     def get_correct_answer(self, id: str) -> _WrappedAnswer | None:
-        for answer in self.root.correctAnswer:
-            if answer.root.id == id:
-                return answer
-        return None
+        position = self._find_position('correctAnswer', id)
+        if position is None:
+            return None
+        return self.root.correctAnswer[position]
 
     def edit_correct_answer(self, id: str, **kwargs) -> _WrappedComponent:
-        for a in self.root.correctAnswer:
-            if a.root.id == id:
-                # Get dict
-                answer_dict = a.root.__dict__
-                # Create new answer
-                new_answer = answer(**answer_dict)
-                # Set with new values
-                new_answer.set(**kwargs)
-                # Filter out old answer
-                self.root.correctAnswer = [_a for _a in self.root.correctAnswer if _a.root.id != id]
-                # Add new answer
-                self.root.correctAnswer.append(new_answer)
-                # Return component
-                return self
-
-        raise ValueError('No answer with given ID found.')
+        position = self._find_position('correctAnswer', id)
+        if position is None:
+            raise ValueError('No answer with given ID found.')
+
+        self._detach('correctAnswer')
+        current = self.root.correctAnswer[position]
+        # Replace in place with a new answer to keep the original order
+        self.root.correctAnswer[position] = answer(**{**vars(getattr(current, 'root', current)), **kwargs})
+        if 'id' in kwargs:
+            self._id_indexes.pop('correctAnswer', None)
+        return self
 
     def correct_answer_context(self, **kwargs):
         self.metadata__ = kwargs
@@ -202,14 +255,95 @@ class _WrappedUIConfig(_JSONableBaseModel):
 class _WrappedComponentBlock(_JSONableBaseModel):
     root: rvt_models.ComponentBlock
     component_objects__: List[_WrappedComponent]
+    # Name -> component lookup kept in sync with component_objects__
+    _component_index: Dict[str, _WrappedComponent] = PrivateAttr(default_factory=dict)
+    # Permutations not yet applied to root and component_objects__ (see permute)
+    _permutation_plan: List[dict] = PrivateAttr(default_factory=list)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._set_components(self.component_objects__)
+
+    def __getattr__(self, item: str) -> Any:
+        # root and component_objects__ are removed while permutations are planned,
+        # so reading them applies the plan. Other reads never get here.
+        if item in ('root', 'component_objects__') and self._permutation_plan:
+            self._materialize()
+            return self.__dict__[item]
+        return super().__getattr__(item)
+
+    def __eq__(self, other: Any) -> bool:
+        self._materialize()
+        if isinstance(other, _WrappedComponentBlock):
+            other._materialize()
+        return super().__eq__(other)
+
+    def __repr_args__(self):
+        self._materialize()
+        return super().__repr_args__()
+
+    def _materialize(self) -> None:
+        # Applies planned permutations; called by every method serializing the sequence
+        if not self._permutation_plan:
+            return
+        plan = self._permutation_plan
+        self._permutation_plan = []
+        new_root, new_components = _permute_sequence_tree(plan[0]['root'], plan)
+        # Set new objects
+        self._set_components(new_components)
+        # Set new root
+        self.root = new_root
+
+    def _index_component(self, other: _WrappedComponent, index: Optional[dict] = None) -> None:
+        index = self._component_index if index is None else index
+        existing = index.get(other.component_name__)
+        if existing is None:
+            index[other.component_name__] = other
+        # The same component may appear several times in a sequence, but two
+        # different components cannot share a name in the final configuration.
+        elif existing is not other and existing.root != other.root:
+            raise RevisitError(
+                message=f'A different component named "{other.component_name__}" already exists in this sequence.'
+            )
+
+    def _set_components(self, component_objects: List[_WrappedComponent]) -> None:
+        self._component_index = {}
+        for c in component_objects:
+            self._index_component(c)
+        self.component_objects__ = component_objects
+
+    def to_dict(self) -> dict:
+        self._materialize()
+        return super().to_dict()
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        self._materialize()
+        return super().to_json(indent)
+
+    def model_dump(self, **kwargs) -> dict:
+        self._materialize()
+        return super().model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs) -> str:
+        self._materialize()
+        return super().model_dump_json(**kwargs)
 
     def __add__(self, other):
         """Allows addition operator to append to sequence components list."""
+        self._materialize()
         if isinstance(other, _WrappedComponent):
+            self._index_component(other)
             self.component_objects__.append(other)
             self.root.components.append(other.component_name__)
             return self
         elif isinstance(other, _WrappedComponentBlock):
+            other._materialize()
+            # Check every component before changing anything, so a conflict
+            # leaves this sequence as it was
+            index = dict(self._component_index)
+            for c in other.component_objects__:
+                self._index_component(c, index)
+            self._component_index = index
+
             # Extend existing list of components with new set of components for tracking
             self.component_objects__.extend(other.component_objects__)
 
@@ -218,29 +352,50 @@ class _WrappedComponentBlock(_JSONableBaseModel):
             return self
         return NotImplemented
 
-    def component(self, component_function) -> _WrappedComponentBlock:
-
-        self_json = json.loads(self.__str__())
-
-        components_dict = {c.component_name__: c for c in self.component_objects__}
-
-        x = _recursive_map(self_json, components_dict, component_function)
+    def component(
+        self,
+        component_function,
+        workers: Optional[int] = None,
+        executor: Literal['thread', 'process'] = 'thread',
+        cache_size: Optional[int] = 0,
+        report: bool = False
+    ) -> _WrappedComponentBlock:
+        self._materialize()
+
+        new_root, new_components = _map_components(
+            self.root,
+            self._component_index,
+            component_function,
+            workers=workers,
+            executor=executor,
+            cache_size=cache_size,
+            report=report
+        )
 
-        self.component_objects__ = x.component_objects__
-        self.root = x.root
+        self._set_components(new_components)
+        self.root = new_root
 
         return self
 
-    def from_data(self, data_list) -> _WrappedComponentBlock:
-        if not isinstance(data_list, list):
+    def from_data(
+        self,
+        data_list,
+        inherit: Literal['copy', 'overlay'] = 'copy',
+        naming: Literal['verbose', 'hash', 'index'] = 'verbose'
+    ) -> _WrappedComponentBlock:
+        # A single list of rows or DataFrame, or an iterator of chunks (see data_iter)
+        if isinstance(data_list, (list, pd.DataFrame, dict)):
+            chunks = [data_list]
+        elif isinstance(data_list, Iterator):
+            chunks = data_list
+        else:
             raise RevisitError(
-                message="'from_data' must take in a list of data rows. Use reVISit's 'data' method to parse a CSV file into a valid input."
+                message="'from_data' must take in a list of data rows, a DataFrame or an iterator of chunks. Use reVISit's 'data' or 'data_iter' methods to parse a CSV file into a valid input."
             )
 
-        # for every point in self.data (i.e. each row)
-        # create a new component with the attached metadata
-        new_component_objects = []
-        new_component_names = []
+        _check_naming(naming)
+        _check_inherit(inherit)
+        self._materialize()
 
         # If no components exist, make placeholder component
         if len(self.component_objects__) == 0:
@@ -248,73 +403,157 @@ class _WrappedComponentBlock(_JSONableBaseModel):
                 type='questionnaire', component_name__='place-holder-component'
             )
 
-        for entry in self.component_objects__:
-            for datum in data_list:
-                curr_dict = asdict(datum)
-                key_string = "_".join([f'{key}:{value}' for key, value in curr_dict.items()])
-                comp_name = f"{entry.component_name__}_{key_string}"
-                metadata = curr_dict
-                if entry.root.meta is not None:
-                    metadata = {**entry.root.meta, **curr_dict}
-
-                new_comp = __component__(
-                    base__=entry,
-                    component_name__=comp_name,
-                    meta=metadata
-                )
-                new_component_objects.append(new_comp)
-                new_component_names.append(comp_name)
-
-        self.root.components = new_component_names
-        self.component_objects__ = new_component_objects
+        # for every point in self.data (i.e. each row)
+        # create a new component with the attached metadata.
+        # Chunks are consumed once, so components are collected per entry.
+        entries = list(self.component_objects__)
+        entry_components = [[] for _ in entries]
+
+        row_count = 0
+        for chunk in chunks:
+            rows, key_strings = _get_rows_and_key_strings(chunk, naming, start=row_count)
+            row_count += len(rows)
+            for entry, new_components in zip(entries, entry_components):
+                # Every row shares the entry's validated state; only the metadata is set per row
+                entry_meta = _unwrap_root(entry.root).meta or {}
+                new_components.extend(_derive_components(
+                    entry,
+                    entry,
+                    [f"{entry.component_name__}_{key_string}" for key_string in key_strings],
+                    [{**entry_meta, **row} for row in rows],
+                    inherit=inherit
+                ))
+
+        new_component_objects = [c for new_components in entry_components for c in new_components]
+        self._set_components(new_component_objects)
+        self.root.components = [c.component_name__ for c in new_component_objects]
         return self
 
     def get_component(self, name: str) -> _WrappedComponent:
-        for entry in self.component_objects__:
-            if entry.component_name__ == name:
-                return entry
+        self._materialize()
+        return self._component_index.get(name)
 
     def get_components(self) -> _WrappedComponent:
+        self._materialize()
         return self.component_objects__
 
+    def lookup_table(self) -> pd.DataFrame:
+        """Returns the meta attributes of every component in the sequence, indexed by component name."""
+        self._materialize()
+        metas = {c.component_name__: _unwrap_root(c.root).meta or {} for c in self.component_objects__}
+        return pd.DataFrame(list(metas.values()), index=pd.Index(list(metas), name='component'))
+
     def permute(
         self,
         factors: List[str],
         order: rvt_models.Order,
         numSamples: Optional[int] = None,
+        inherit: Literal['copy', 'overlay'] = 'copy',
+        naming: Literal['verbose', 'hash', 'index'] = 'verbose',
     ) -> _WrappedComponentBlock:
 
-        # Initialize components list with blank component if empty
-        make_comp_block = True
-        if len(self.component_objects__) == 0:
-            self = self + __component__(type='questionnaire', component_name__='place-holder-component')
-        # If there only exists one component (either existing one or placeholder),
-        # do not create the first component blocks.
-        if len(self.component_objects__) == 1:
-            make_comp_block = False
-
-        # Convert to JSON
-        self_json = json.loads(self.__str__())
-        # Get all current component dictionaries
-        components_dict = {c.component_name__: c for c in self.component_objects__}
-        # Recursively start permutation function
-        new_permuted_component_block = _recursive_json_permutation(
-            self_json,
-            factors=factors,
-            order=order,
-            numSamples=numSamples,
-            input_components=components_dict,
-            make_comp_block=make_comp_block
-        )
-        # Set new objects
-        self.component_objects__ = new_permuted_component_block.component_objects__
-        # Set new root
-        self.root = new_permuted_component_block.root
+        return self._plan_permutation([factors], order, numSamples, inherit, naming)
+
+    def factorial(
+        self,
+        factors: Dict[str, list],
+        order: rvt_models.Order,
+        numSamples: Optional[int] = None,
+        nesting: Optional[List[str]] = None,
+        inherit: Literal['copy', 'overlay'] = 'copy',
+        naming: Literal['verbose', 'hash', 'index'] = 'verbose',
+    ) -> _WrappedComponentBlock:
+        nesting = list(nesting or [])
+        if len(factors) == 0:
+            raise RevisitError(message='"factorial" requires at least one factor.')
+        for factor in nesting:
+            if factor not in factors:
+                raise RevisitError(message=f'Nested factor "{factor}" is not one of the factors.')
+
+        # One block level per nested factor, then one block crossing the remaining factors
+        levels = [[{factor: value} for value in factors[factor]] for factor in nesting]
+        crossed = [factor for factor in factors if factor not in nesting]
+        if crossed:
+            levels.append([
+                dict(zip(crossed, values))
+                for values in itertools.product(*(factors[factor] for factor in crossed))
+            ])
+        return self._plan_permutation(levels, order, numSamples, inherit, naming)
+
+    def _plan_permutation(
+        self,
+        levels: List[List[dict]],
+        order: rvt_models.Order,
+        numSamples: Optional[int],
+        inherit: Literal['copy', 'overlay'],
+        naming: Literal['verbose', 'hash', 'index']
+    ) -> _WrappedComponentBlock:
+        _check_naming(naming)
+        _check_inherit(inherit)
+        # Number of components once the planned permutations are applied
+        plan = self._permutation_plan
+        count = plan[-1]['count'] if plan else None
+        if count == 0:
+            self._materialize()
+            count = None
+
+        if count is None:
+            # Initialize components list with blank component if empty
+            if len(self.component_objects__) == 0:
+                self = self + __component__(type='questionnaire', component_name__='place-holder-component')
+            count = len(self.component_objects__)
+
+        # Components are only created when the sequence is read, so chained
+        # permutations never build the intermediate components. The components
+        # are copied as they are now, so later edits do not change the result.
+        if not plan:
+            root = self.__dict__.pop('root')
+            del self.__dict__['component_objects__']
+            sources = {
+                name: (_derive_components(comp, comp.base__, [name])[0], comp)
+                for name, comp in self._component_index.items()
+            }
+        self._permutation_plan = [*plan, {
+            'root': plan[0]['root'] if plan else root,
+            'sources': plan[0]['sources'] if plan else sources,
+            'levels': levels,
+            'order': order,
+            'numSamples': numSamples,
+            'inherit': inherit,
+            'naming': naming,
+            # If there only exists one component (either existing one or placeholder),
+            # do not create the first component blocks.
+            'make_comp_block': count != 1,
+            'count': count * math.prod(len(entries) for entries in levels),
+        }]
         return self
 
 
 class _WrappedStudyConfig(_JSONableBaseModel):
     root: rvt_models.StudyConfig
+    # Asset names given by widget() to source files, reused by later calls (see _plan_assets)
+    _asset_names: Dict[tuple, str] = PrivateAttr(default_factory=dict)
+
+    def write(self, file, indent: Optional[int] = None, compress: bool = False) -> None:
+        """Writes the study configuration to a path or an open file object.
+
+        The components dictionary and the sequence tree are written one entry at a
+        time, so the full configuration string is never held in memory. Paths ending
+        in ".gz" are gzip compressed, as are file objects when "compress" is True.
+        """
+        if isinstance(file, (str, os.PathLike)):
+            if compress or os.fspath(file).endswith('.gz'):
+                handle = gzip.open(file, mode='wt', encoding='utf-8')
+            else:
+                handle = open(file, mode='w', encoding='utf-8')
+            with handle:
+                _write_json_chunks(handle, self.root, indent)
+        elif compress:
+            # Closing the gzip writer flushes it without closing the caller's file.
+            with gzip.open(file, mode='wt', encoding='utf-8') as handle:
+                _write_json_chunks(handle, self.root, indent)
+        else:
+            _write_json_chunks(file, self.root, indent)
 
 
 class _StudyConfigType(rvt_models.StudyConfigType):
@@ -350,74 +589,24 @@ def component(**kwargs: Any) -> _WrappedComponent: ...
 def component(**kwargs) -> _WrappedComponent:
     # Inherit base
     base_component = kwargs.get('base__', None)
-    if base_component:
+    _check_inherit(kwargs.get('inherit__', 'copy'))
+    if base_component and kwargs.get('inherit__', 'copy') == 'overlay':
+        return _overlay_component(base_component, kwargs)
+    elif base_component:
         base_fields = vars(base_component.root)
         for key, value in base_fields.items():
             if key not in kwargs:
                 kwargs[key] = value
     # Get kwargs to pass to individual component
     filter_kwargs = _get_filtered_kwargs(rvt_models.IndividualComponent, kwargs)
-    # Grab response list
-    response = filter_kwargs.get('response')
+    # Replace wrapped responses and answers with their models
+    _unwrap_response_lists(filter_kwargs)
     # Sets default response list
-    valid_response = []
-    # If response present
-    if response is not None:
-        for r in response:
-            # Prevent dict input
-            if isinstance(r, dict):
-                raise RevisitError(message='Cannot pass a dictionary directly into "Response" list.')
-
-            response_type_hint = get_type_hints(rvt_models.Response).get('root')
-            response_types = get_args(response_type_hint)
-            # If wrapped, get root
-
-            if isinstance(r, _WrappedResponse) or isinstance(r, rvt_models.Response):
-                valid_response.append(r.root)
-
-            # If not wrapped but is valid response, append to list
-            elif r.__class__ in response_types:
-                valid_response.append(r)
-
-            # If other unknown type, raise error
-            else:
-                raise RevisitError(message=f'Invalid type {type(r)} for "Response" class.')
-
-    filter_kwargs['response'] = valid_response
-
-    # Grab correct answer list
-    correct_answer = filter_kwargs.get('correctAnswer')
-    # Sets default correct answer list
-    valid_correct_answer = []
-    # If correct answer present
-    if correct_answer is not None:
-        for a in correct_answer:
-            # Prevent dict input
-            if isinstance(a, dict):
-                raise RevisitError(message='Cannot pass a dictionary directly into "Correct Answer" list.')
+    filter_kwargs.setdefault('response', [])
 
-            answer_type_hint = get_type_hints(rvt_models.Answer).get('root')
-            answer_types = get_args(answer_type_hint)
-            # If wrapped, get root
-            if isinstance(a, _WrappedAnswer):
-                valid_correct_answer.append(a.root)
-
-            elif isinstance(a, rvt_models.Answer):
-                valid_correct_answer.append(a)
-
-            # If not wrapped but is valid response, append to list
-            elif a.__class__ in answer_types:
-                valid_correct_answer.append(a)
-
-            # If other unknown type, raise error
-            else:
-                raise RevisitError(message=f'Invalid type {type(a)} for "Correct Answer" class.')
-
-        filter_kwargs['correctAnswer'] = valid_correct_answer
-
-    # Validate component
-    _validate_component(filter_kwargs)
-    base_model = rvt_models.IndividualComponent(**filter_kwargs)
+    # Validate component once against its concrete type. The result is already
+    # valid so the union wrapper does not need to validate it again.
+    base_model = rvt_models.IndividualComponent.model_construct(_validate_component(filter_kwargs))
 
     try:
         return _WrappedComponent(**kwargs, root=base_model)
@@ -429,6 +618,51 @@ def component(**kwargs) -> _WrappedComponent:
 __component__ = component
 
 
+def component_batch(
+    names: List[str],
+    meta: Optional[List[dict] | pd.DataFrame] = None,
+    fields: Optional[dict | pd.DataFrame] = None,
+    order: Optional[rvt_models.Order] = None,
+    **kwargs
+) -> List[_WrappedComponent] | _WrappedComponentBlock:
+    """Creates one component per name, sharing every property in kwargs.
+
+    The shared properties (including base__) are validated once. Per component,
+    only the entries of "meta" and the columns of "fields" are validated. When
+    "order" is given, the components are returned as a sequence.
+    """
+    names = list(names)
+    if isinstance(meta, pd.DataFrame):
+        meta = meta.to_dict(orient='records')
+    if isinstance(fields, pd.DataFrame):
+        fields = fields.to_dict(orient='list')
+    fields = {key: list(values) for key, values in (fields or {}).items()}
+
+    for column in [meta, *fields.values()]:
+        if column is not None and len(column) != len(names):
+            raise RevisitError(message='Every column passed to "component_batch" must have the same length as "names".')
+
+    # Unwrap responses and answers row by row, as component() does
+    for key in ['response', 'correctAnswer']:
+        if key in fields:
+            rows = [{key: value} for value in fields[key]]
+            for row in rows:
+                _unwrap_response_lists(row)
+            fields[key] = [row[key] for row in rows]
+
+    # Validate the shared properties once
+    template = __component__(**{**kwargs, 'component_name__': 'component-batch-template'})
+    template_meta = _unwrap_root(template.root).meta
+    if meta is not None and template_meta is not None:
+        meta = [{**template_meta, **row} for row in meta]
+
+    components = _derive_components(template, template.base__, names, meta, fields)
+
+    if order is not None:
+        return __sequence__(order=order, components=components)
+    return components
+
+
 # Response factory function
 @overload
 def response(**kwargs: Unpack[rvt_models.NumericalResponseType]) -> _WrappedResponse: ...
@@ -456,8 +690,7 @@ def response(**kwargs: Any) -> _WrappedResponse: ...
 
 def response(**kwargs) -> _WrappedResponse:
     filter_kwargs = _get_filtered_kwargs(rvt_models.Response, kwargs)
-    _validate_response(filter_kwargs)
-    base_model = rvt_models.Response(**filter_kwargs)
+    base_model = rvt_models.Response.model_construct(_validate_response(filter_kwargs))
     # We've validated the response for a particular type. Now, how do we validate the wrapped component correctly?
     try:
         return _WrappedResponse(**kwargs, root=base_model)
@@ -522,33 +755,90 @@ __sequence__ = sequence
 
 
 @overload
-def studyConfig(**kwargs: Unpack[_StudyConfigType]) -> _WrappedStudyConfig: ...
+def studyConfig(dedupe: Optional[Literal['inherit']] = None, **kwargs: Unpack[_StudyConfigType]) -> _WrappedStudyConfig: ...
 @overload
-def studyConfig(**kwargs: Any) -> _WrappedStudyConfig: ...
+def studyConfig(dedupe: Optional[Literal['inherit']] = None, **kwargs: Any) -> _WrappedStudyConfig: ...
 
 
-def studyConfig(**kwargs: Unpack[_StudyConfigType]) -> _WrappedStudyConfig:
+def studyConfig(dedupe: Optional[Literal['inherit']] = None, **kwargs: Unpack[_StudyConfigType]) -> _WrappedStudyConfig:
     filter_kwargs = _get_filtered_kwargs(rvt_models.StudyConfig, kwargs)
 
+    study_sequence = filter_kwargs['sequence']
+    if isinstance(study_sequence, _WrappedComponentBlock):
+        # Planned permutations must be applied before the root is read
+        study_sequence._materialize()
+
     root_list = ['studyMetadata', 'uiConfig', 'sequence']
     un_rooted_kwargs = {x: (y.root if x in root_list and hasattr(y, 'root') else y) for x, y in filter_kwargs.items()}
 
-    study_sequence = filter_kwargs['sequence']
-
     # Merges components from the components list given and the components that are stored in the sequence
-    un_rooted_kwargs['components'] = {
-        comp.component_name__: comp.root for comp in un_rooted_kwargs.get('components', [])
+    wrapped_components = {
+        comp.component_name__: comp for comp in un_rooted_kwargs.get('components', [])
     } | {
-        comp.component_name__: comp.root for comp in study_sequence.component_objects__
+        comp.component_name__: comp for comp in study_sequence.component_objects__
     }
 
+    if dedupe == 'inherit':
+        components, base_components = _inherit_components(wrapped_components)
+        if base_components:
+            existing_base_components = un_rooted_kwargs.get('baseComponents')
+            if existing_base_components is not None:
+                base_components = {**getattr(existing_base_components, 'root', existing_base_components), **base_components}
+            un_rooted_kwargs['baseComponents'] = base_components
+        un_rooted_kwargs['components'] = components
+    elif dedupe is None:
+        un_rooted_kwargs['components'] = {name: comp.root for name, comp in wrapped_components.items()}
+    else:
+        raise RevisitError(message=f'Unexpected dedupe mode: {dedupe}')
+
     base_model = rvt_models.StudyConfig(**un_rooted_kwargs)
     return _WrappedStudyConfig(**kwargs, root=base_model)
 
 
-# Function to parse the CSV and dynamically create data classes
-def data(file_path: str) -> List[Any]:
-    # Read the first row to get the headers
+# Generator that parses a CSV file in chunks of at most chunksize rows
+def data_iter(
+    file_path: str,
+    chunksize: int = 10000,
+    engine: Literal['rows', 'columnar'] = 'rows',
+    cache_size: int = 1024,
+    intern: bool = False,
+    report: bool = False,
+) -> Iterator[List[Any] | pd.DataFrame]:
+    if chunksize < 1:
+        raise RevisitError(message='"chunksize" must be at least 1.')
+
+    # DataFrames, Parquet, JSON Lines and Arrow files are already typed
+    if isinstance(file_path, pd.DataFrame) or _is_typed_data_file(file_path):
+        if engine not in ('rows', 'columnar'):
+            raise RevisitError(message=f'Unexpected engine: {engine}')
+        DataRow = None
+        for chunk in _iter_typed_data(file_path, chunksize):
+            if engine == 'columnar':
+                yield chunk
+            else:
+                DataRow = DataRow or make_dataclass("DataRow", [(str(header), Any) for header in chunk.columns])
+                yield [DataRow(**row) for row in chunk.to_dict(orient='records')]
+        return
+
+    if engine == 'columnar':
+        try:
+            # Column types are inferred over the whole file in a first pass, so every
+            # chunk has the same types as data(file_path, engine='columnar')
+            column_types = {}
+            with pd.read_csv(file_path, keep_default_na=False, dtype=str, chunksize=chunksize) as reader:
+                for chunk in reader:
+                    for column in chunk.columns:
+                        column_type = _column_type(chunk[column])
+                        column_types[column] = _merge_column_types(column_types.get(column, column_type), column_type)
+            with pd.read_csv(file_path, keep_default_na=False, dtype=str, chunksize=chunksize) as reader:
+                for chunk in reader:
+                    yield _convert_columns(chunk, column_types)
+        except pd.errors.EmptyDataError:
+            raise RevisitError(message="No headers found in CSV file.")
+        return
+    elif engine != 'rows':
+        raise RevisitError(message=f'Unexpected engine: {engine}')
+
     with open(file_path, mode='r') as csvfile:
         csv_reader = csv.DictReader(csvfile)
         headers = csv_reader.fieldnames
@@ -558,28 +848,98 @@ def data(file_path: str) -> List[Any]:
         # Create a data class with attributes based on the headers
         DataRow = make_dataclass("DataRow", [(header, Any) for header in headers])
 
+        # Repeated cell values are only converted once per column
+        converters = {header: _make_column_converter(cache_size, intern) for header in headers}
+
         # Parse each row into an instance of the dynamically created data class
         data_rows = []
         for row in csv_reader:
             # Convert the row values to the appropriate types (e.g., int, float, bool)
-            data = {key: _convert_value(value) for key, value in row.items()}
-            data_row = DataRow(**data)
-            data_rows.append(data_row)
+            data = {key: converters[key](value) for key, value in row.items()}
+            data_rows.append(DataRow(**data))
+            if len(data_rows) == chunksize:
+                yield data_rows
+                data_rows = []
+        if data_rows:
+            yield data_rows
+
+    if report:
+        _report_conversion_cache(converters)
+
 
-    return data_rows
+# Function to parse the CSV and dynamically create data classes
+def data(
+    file_path: str | pd.DataFrame,
+    engine: Literal['rows', 'columnar'] = 'rows',
+    cache_size: int = 1024,
+    intern: bool = False,
+    report: bool = False,
+) -> List[Any] | pd.DataFrame:
+    if engine == 'columnar':
+        if isinstance(file_path, pd.DataFrame):
+            return file_path
+        elif _is_typed_data_file(file_path):
+            return _read_typed_data(file_path)
+        return _data_columnar(file_path)
+    elif engine != 'rows':
+        raise RevisitError(message=f'Unexpected engine: {engine}')
+
+    return [
+        data_row
+        for chunk in data_iter(file_path, cache_size=cache_size, intern=intern, report=report)
+        for data_row in chunk
+    ]
+
+
+def widget(
+    study: _WrappedStudyConfig,
+    revisitPath: str = '',
+    server=False,
+    pathToLib='',
+    link_mode: Literal['copy', 'hardlink', 'symlink'] = 'copy',
+    workers: Optional[int] = None
+):
+    # Later calls to Widget.update_study stage assets the same way
+    build_config = functools.partial(
+        _widget_config,
+        revisitPath=revisitPath,
+        server=server,
+        pathToLib=pathToLib,
+        link_mode=link_mode,
+        workers=workers
+    )
+    config = build_config(study)
+
+    w = _widget.Widget()
+    w._build_config = build_config
+    w.config = config
+    return w
 
 
-def widget(study: _WrappedStudyConfig, revisitPath: str = '', server=False, pathToLib=''):
+# Stages the assets of a study and returns its configuration with the asset
+# paths pointed at the staged files.
+def _widget_config(
+    study: _WrappedStudyConfig,
+    revisitPath: str = '',
+    server=False,
+    pathToLib='',
+    link_mode: Literal['copy', 'hardlink', 'symlink'] = 'copy',
+    workers: Optional[int] = None
+) -> dict:
 
     # If server is set to true, needs to use the correct package path.
     # If server is not true, needs to have a valid revisitPath. I think we already handle that below
 
+    if link_mode not in ('copy', 'hardlink', 'symlink'):
+        raise RevisitError(message=f'Unknown link_mode "{link_mode}". Use "copy", "hardlink" or "symlink".')
+
     if server is False and not os.path.isdir(revisitPath):
         raise RevisitError(message=f'"{revisitPath}" does not exist. Specify a correct revisitPath or use the revisitpy_server module and set "server" to "True".')
 
     # Set defaults for when not using server.
     dest_loc = f"{revisitPath}/public/__revisit-widget/assets/"
     dest_loc_react = f"{revisitPath}/src/public/__revisit-widget/assets/"
+    manifest_root = revisitPath
 
     # If using server,
     if server is True:
@@ -602,77 +962,36 @@ def widget(study: _WrappedStudyConfig, revisitPath: str = '', server=False, path
                 raise RevisitError(message='Cannot locate "revisitpy_server" package in current environment. Specify directory using "pathToLib" or install "revisit_server" in same environment as "revisit" package.')
 
             dest_loc = f"{revisit_server_dir}/static/__revisit-widget/assets/"
+            manifest_root = revisit_server_dir
         else:
             if not os.path.isdir(pathToLib):
                 raise RevisitError(message=f'"{pathToLib}" is not a directory.')
             dest_loc = f"{pathToLib}/static/__revisit-widget/assets/"
+            manifest_root = pathToLib
             if not os.path.isdir(dest_loc):
                 raise RevisitError(message=f'"{dest_loc}" is not a directory.')
 
-    extracted_paths = []
-
-    for component in study.root.components.values():
-        actual_component = component.root
-        if hasattr(actual_component, 'root'):
-            actual_component = actual_component.root
-        if hasattr(actual_component, 'path'):
-
-            fileName = actual_component.path.split('/')[-1]
-
-            if actual_component.type == 'react-component':
-                dest = f"{dest_loc_react}{fileName}"
-            else:
-                dest = f"{dest_loc}{fileName}"
-
-            extracted_paths.append({
-                "type": actual_component.type,
-                "src": actual_component.path,
-                "dest": dest
-            })
-
-            newPath = f"__revisit-widget/assets/{fileName}"
-            actual_component.path = newPath
-
-    uiConfig = study.root.uiConfig
-    if uiConfig.helpTextPath is not None:
-
-        fileName = uiConfig.helpTextPath.split('/')[-1]
-        dest = f"{dest_loc}{fileName}"
-
-        extracted_paths.append({
-            "type": 'helpTextPath',
-            "src": uiConfig.helpTextPath,
-            "dest": dest
-        })
-
-        newPath = f"__revisit-widget/assets/{fileName}"
-        uiConfig.helpTextPath = newPath
+    # The study itself is never changed; paths are only rewritten in its output
+    config = study.to_dict()
 
-    if uiConfig.logoPath is not None:
+    # The output is walked on every call so edits between previews are picked up
+    plan = _plan_assets(config, study._asset_names)
 
-        fileName = uiConfig.logoPath.split('/')[-1]
-
-        dest = f"{dest_loc}{fileName}"
-
-        extracted_paths.append({
-            "type": 'logoPath',
-            "src": uiConfig.logoPath,
-            "dest": dest
-        })
-
-        newPath = f"__revisit-widget/assets/{fileName}"
-        uiConfig.logoPath = newPath
+    # Point every reference at its staged asset
+    for keys, asset in plan['references']:
+        _get_nested(config, keys[:-1])[keys[-1]] = f"__revisit-widget/assets/{asset['name']}"
 
     # Copy all files
-    for item in extracted_paths:
-        if item['type'] == 'react-component' and server is True:
+    staged_paths = []
+    for asset in plan['assets']:
+        if asset['type'] == 'react-component' and server is True:
             print('Skipping react component when "server" is set to "True".')
         else:
-            _copy_file(item['src'], item['dest'])
+            dest = f"{dest_loc_react if asset['type'] == 'react-component' else dest_loc}{asset['name']}"
+            staged_paths.append({'type': asset['type'], 'src': asset['src'], 'dest': dest})
+    _stage_assets(staged_paths, manifest_root, link_mode=link_mode, workers=workers)
 
-    w = _widget.Widget()
-    w.config = json.loads(study.__str__())
-    return w
+    return config
 
 
 # ------- PRIVATE FUNCTIONS ------------ #
@@ -685,7 +1004,7 @@ def _validate_component(kwargs: dict):
         raise RevisitError(message=f"Unexpected component type: {kwargs['type']}")
 
     try:
-        return rvt_models.IndividualComponent.model_validate(kwargs).root
+        return _get_discriminated_adapter(rvt_models.IndividualComponent).validate_python(kwargs)
     except ValidationError as e:
         temp_errors = []
 
@@ -718,7 +1037,7 @@ def _validate_response(kwargs: dict):
             raise RevisitError(message=f'Unexpected type: {type_value}')
 
         try:
-            return rvt_models.Response.model_validate(kwargs).root
+            return _get_discriminated_adapter(rvt_models.Response).validate_python(kwargs)
         except ValidationError as e:
             temp_errors = []
             for entry in e.errors():
@@ -743,6 +1062,9 @@ def _generate_possible_component_types():
 
 # Generates mappings between the response class name and the
 # type string literal. Creates the reversed mapping as well.
+# The models module never changes at runtime, so the result is computed
+# once per union class and shared by every factory call.
+@functools.cache
 def _generate_possible_types(orig_cls):
     type_hints = get_type_hints(orig_cls).get('root')
     types = get_args(type_hints)
@@ -812,21 +1134,56 @@ def pretty_error(errors):
     return new_error_messages
 
 
-def _get_filtered_kwargs(class_type: Any, kwargs):
-    try:
-        possible_items = get_args(class_type.model_fields.get('root').annotation)
-    except AttributeError:
-        possible_items = [class_type]
+# Returns the member classes of a RootModel union (e.g. every response class
+# of "Response"). Non-union models return an empty tuple.
+@functools.cache
+def _get_union_members(orig_cls) -> tuple:
+    root_type = orig_cls.model_fields.get('root')
+    if root_type is None:
+        return ()
+    return get_args(root_type.annotation)
+
+
+# Builds a validator for a union model that dispatches on the "type" field
+# instead of trying every member of the union. Members are tagged with their
+# class name so validation errors keep the same location as the plain union.
+@functools.cache
+def _get_discriminated_adapter(orig_cls) -> TypeAdapter:
+    class_names = _generate_possible_types(orig_cls)[1]
+
+    def get_tag(value):
+        if isinstance(value, dict):
+            type_value = value.get('type')
+        else:
+            type_value = getattr(value, 'type', None)
+        if isinstance(type_value, Enum):
+            type_value = type_value.value
+        return class_names.get(type_value)
+
+    tagged_members = tuple(
+        Annotated[cls, Tag(cls.__name__)] for cls in _get_union_members(orig_cls)
+    )
+    return TypeAdapter(Annotated[Union[tagged_members], Discriminator(get_tag)])
+
+
+# Set of every field name accepted by a model or by any member of a union model.
+@functools.cache
+def _get_valid_fields(class_type: Any) -> frozenset:
+    possible_items = _get_union_members(class_type) or (class_type,)
 
     valid_fields = set()
     for model in possible_items:
         if 'root' in model.model_fields.keys():
-            unioned_classes = (get_args(get_type_hints(model).get('root')))
-            for cls in unioned_classes:
+            for cls in _get_union_members(model):
                 valid_fields.update(cls.model_fields.keys())
 
         valid_fields.update(model.model_fields.keys())
 
+    return frozenset(valid_fields)
+
+
+def _get_filtered_kwargs(class_type: Any, kwargs):
+    valid_fields = _get_valid_fields(class_type)
     return {key: value for key, value in kwargs.items() if key in valid_fields}
 
 
@@ -846,6 +1203,474 @@ def _convert_value(value: str) -> Any:
         return value  # Return as string if it cannot be converted
 
 
+# Replaces wrapped responses and answers in the given component kwargs with
+# their underlying models. Modifies filter_kwargs in place.
+def _unwrap_response_lists(filter_kwargs: dict) -> None:
+    # Grab response list
+    response = filter_kwargs.get('response')
+    valid_response = []
+    # If response present
+    if response is not None:
+        for r in response:
+            # Prevent dict input
+            if isinstance(r, dict):
+                raise RevisitError(message='Cannot pass a dictionary directly into "Response" list.')
+
+            response_types = _get_union_members(rvt_models.Response)
+            # If wrapped, get root
+
+            if isinstance(r, _WrappedResponse) or isinstance(r, rvt_models.Response):
+                valid_response.append(r.root)
+
+            # If not wrapped but is valid response, append to list
+            elif r.__class__ in response_types:
+                valid_response.append(r)
+
+            # If other unknown type, raise error
+            else:
+                raise RevisitError(message=f'Invalid type {type(r)} for "Response" class.')
+
+    if 'response' in filter_kwargs:
+        filter_kwargs['response'] = valid_response
+
+    # Grab correct answer list
+    correct_answer = filter_kwargs.get('correctAnswer')
+    # Sets default correct answer list
+    valid_correct_answer = []
+    # If correct answer present
+    if correct_answer is not None:
+        for a in correct_answer:
+            # Prevent dict input
+            if isinstance(a, dict):
+                raise RevisitError(message='Cannot pass a dictionary directly into "Correct Answer" list.')
+
+            answer_types = _get_union_members(rvt_models.Answer)
+            # If wrapped, get root
+            if isinstance(a, _WrappedAnswer):
+                valid_correct_answer.append(a.root)
+
+            elif isinstance(a, rvt_models.Answer):
+                valid_correct_answer.append(a)
+
+            # If not wrapped but is valid response, append to list
+            elif a.__class__ in answer_types:
+                valid_correct_answer.append(a)
+
+            # If other unknown type, raise error
+            else:
+                raise RevisitError(message=f'Invalid type {type(a)} for "Correct Answer" class.')
+
+        filter_kwargs['correctAnswer'] = valid_correct_answer
+
+
+def _overlay_component(base_component: _WrappedComponent, kwargs: dict) -> _WrappedComponent:
+    overrides = _get_filtered_kwargs(rvt_models.IndividualComponent, kwargs)
+    _unwrap_response_lists(overrides)
+
+    base_type = getattr(base_component.root, 'root', base_component.root).type
+    if overrides.pop('type', base_type) != base_type:
+        raise RevisitError(message=f'Cannot change type from {base_type} when using "overlay" inheritance.')
+
+    try:
+        root = _copy_with_fields(base_component.root, overrides, copy_containers=False)
+        base_component._share()
+        return _WrappedComponent(
+            **{**kwargs, 'overrides__': list(overrides)},
+            root=rvt_models.IndividualComponent.model_construct(root)
+        )
+    except ValidationError as e:
+        raise RevisitError(e.errors())
+
+
+# Splits components into base components and thin inherited components that
+# only store the fields that differ from their base. Components created from the
+# same base__ inherit from it. Other components of the same type inherit from a
+# generated base holding the fields they all share, when that makes the output smaller.
+def _inherit_components(components: Dict[str, _WrappedComponent]) -> tuple:
+    output = {}
+    base_components = {}
+    base_names = {}
+    ungrouped = {}
+
+    for name, comp in components.items():
+        base = comp.base__
+        overrides = None
+        if base is not None:
+            overrides = _get_overrides(comp, base)
+        if overrides is None:
+            ungrouped.setdefault(type(_unwrap_root(comp.root)), []).append((name, comp))
+            continue
+
+        if id(base) not in base_names:
+            base_name = _unique_name(base.component_name__, base_components)
+            base_names[id(base)] = base_name
+            base_components[base_name] = rvt_models.BaseComponents1(**_plain_fields(_set_fields(_unwrap_root(base.root))))
+        output[name] = rvt_models.InheritedComponent(baseComponent=base_names[id(base)], **_plain_fields(overrides))
+
+    for cls, group in ungrouped.items():
+        shared = _get_shared_fields([_unwrap_root(comp.root) for _, comp in group])
+        if shared is None:
+            output.update({name: comp.root for name, comp in group})
+            continue
+
+        type_value = _unwrap_root(group[0][1].root).type
+        base_name = _unique_name(f'{type_value}-base', base_components)
+        base_components[base_name] = rvt_models.BaseComponents1(type=type_value, **_plain_fields(shared))
+        for name, comp in group:
+            fields = _set_fields(_unwrap_root(comp.root))
+            output[name] = rvt_models.InheritedComponent(
+                baseComponent=base_name,
+                **_plain_fields({key: value for key, value in fields.items() if key not in shared and key != 'type'})
+            )
+
+    # Keep the original component order
+    return {name: output[name] for name in components}, base_components
+
+
+# Component fields with wrapped responses and answers (e.g. added by responses()
+# or edit_response()) replaced by their models, as the output models expect.
+def _plain_fields(fields: dict) -> dict:
+    fields = dict(fields)
+    _unwrap_response_lists(fields)
+    return fields
+
+
+# Returns the fields of a component that differ from its base, or None if the
+# component cannot be written as an inherited component.
+def _get_overrides(comp: _WrappedComponent, base: _WrappedComponent) -> Optional[dict]:
+    model = _unwrap_root(comp.root)
+    base_model = _unwrap_root(base.root)
+    if type(model) is not type(base_model):
+        return None
+
+    # Every field is compared, overlays included, since the base may have been
+    # changed after they were created. Shared values are skipped by identity.
+    overrides = {}
+    for field in type(model).model_fields:
+        value = getattr(model, field)
+        base_value = getattr(base_model, field)
+        if value is base_value or value == base_value:
+            continue
+        # Inherited components cannot unset a field of the base
+        if value is None:
+            return None
+        overrides[field] = value
+    return overrides
+
+
+# Returns the fields (other than type) that every component in the group has
+# with the same value, or None if a shared base would not make the output smaller.
+def _get_shared_fields(models: list) -> Optional[dict]:
+    if len(models) < 2:
+        return None
+
+    first = models[0]
+    shared = {}
+    for field, value in _set_fields(first).items():
+        if field != 'type' and all(getattr(model, field) == value for model in models[1:]):
+            shared[field] = value
+    if not shared:
+        return None
+
+    shared_size = len(to_json(shared, exclude_none=True, by_alias=True))
+    reference_size = len('"baseComponent":"",') + len(type(first).__name__) + len('-base')
+    if shared_size * (len(models) - 1) <= reference_size * len(models):
+        return None
+    return shared
+
+
+def _unwrap_root(model):
+    # Vega components wrap the concrete model in another root
+    return getattr(model, 'root', model)
+
+
+def _set_fields(model) -> dict:
+    return {key: value for key, value in vars(model).items() if value is not None}
+
+
+def _unique_name(name: str, existing: dict) -> str:
+    unique_name = name
+    counter = 1
+    while unique_name in existing:
+        unique_name = f'{name}__{counter}'
+        counter += 1
+    return unique_name
+
+
+# Creates one component per name from an already validated source component.
+# Only the per-component metadata and fields are validated.
+def _derive_components(
+    source: _WrappedComponent,
+    base: Optional[_WrappedComponent],
+    names: List[str],
+    metas: Optional[List[dict]] = None,
+    fields: Optional[dict] = None,
+    inherit: Literal['copy', 'overlay'] = 'copy'
+) -> List[_WrappedComponent]:
+    fields = fields or {}
+    overlay = inherit == 'overlay'
+    overrides = [*fields, *(['meta'] if metas is not None else [])]
+    if overlay:
+        source._share()
+
+    components = []
+    for i, name in enumerate(names):
+        row_fields = {key: values[i] for key, values in fields.items()}
+        if metas is not None:
+            row_fields['meta'] = metas[i]
+        try:
+            root = _copy_with_fields(source.root, row_fields, copy_containers=not overlay)
+            components.append(_WrappedComponent(
+                component_name__=name,
+                base__=base,
+                overrides__=list(overrides) if overlay else None,
+                root=rvt_models.IndividualComponent.model_construct(root)
+            ))
+        except ValidationError as e:
+            raise RevisitError(e.errors())
+    return components
+
+
+# Returns the metadata dict and the "key:value" name part of every row in a chunk.
+def _get_rows_and_key_strings(
+    chunk,
+    naming: Literal['verbose', 'hash', 'index'] = 'verbose',
+    start: int = 0
+) -> tuple:
+    # Columnar data (a DataFrame or a dict of columns) is handled in bulk
+    if isinstance(chunk, (pd.DataFrame, dict)):
+        data_columns = pd.DataFrame(chunk)
+        rows = data_columns.to_dict(orient='records')
+        if naming == 'verbose':
+            return rows, _get_key_strings(data_columns)
+    elif isinstance(chunk, list):
+        rows = [asdict(datum) for datum in chunk]
+    else:
+        raise RevisitError(message=f'Invalid data chunk of type {type(chunk)}.')
+    return rows, [_factor_name(row, naming, start + i) for i, row in enumerate(rows)]
+
+
+# The part of a component name identifying its factors. Verbose names list every
+# "key:value" pair, hashed names are a short digest of them and indexed names are
+# the position of the factors in their expansion.
+def _factor_name(factors: dict, naming: Literal['verbose', 'hash', 'index'], index: int) -> str:
+    if naming == 'hash':
+        return hashlib.blake2b(_canonical_json(factors).encode(), digest_size=6).hexdigest()
+    elif naming == 'index':
+        return str(index)
+    return "_".join(f"{key}:{value}" for key, value in factors.items())
+
+
+def _check_naming(naming: str) -> None:
+    if naming not in ('verbose', 'hash', 'index'):
+        raise RevisitError(message=f'Unknown naming "{naming}". Use "verbose", "hash" or "index".')
+
+
+def _check_inherit(inherit: str) -> None:
+    if inherit not in ('copy', 'overlay'):
+        raise RevisitError(message=f'Unknown inherit "{inherit}". Use "copy" or "overlay".')
+
+
+# Builds the "key:value" part of component names for every row of a DataFrame.
+def _get_key_strings(data_columns: pd.DataFrame) -> List[str]:
+    if len(data_columns.columns) == 0:
+        return [''] * len(data_columns)
+    parts = [f'{key}:' + data_columns[key].astype(str) for key in data_columns.columns]
+    return parts[0].str.cat(parts[1:], sep='_').tolist()
+
+
+# Copies a validated model and validates only the given fields on the copy.
+# Top level lists and dicts are copied so edits on one copy do not leak into the
+# others, unless copy_containers is False and they are shared with the original.
+def _copy_with_fields(model, fields: dict, copy_containers: bool = True):
+    if isinstance(model, RootModel):
+        return type(model).model_construct(_copy_with_fields(model.root, fields, copy_containers))
+
+    copied = model.model_copy()
+    if copy_containers:
+        for key, value in vars(copied).items():
+            if isinstance(value, (list, dict)):
+                copied.__dict__[key] = copy.copy(value)
+    for key, value in fields.items():
+        copied.__pydantic_validator__.validate_assignment(copied, key, value)
+    return copied
+
+
+# Responses and answers may be stored wrapped or unwrapped.
+def _get_item_id(item) -> str:
+    return getattr(item, 'root', item).id
+
+
+# Creates a copy of a response with the given fields changed, validating it once.
+def _edited_response(current, kwargs: dict) -> _WrappedResponse:
+    current_type = current.type.value if isinstance(current.type, Enum) else current.type
+    new_type = kwargs.get('type', current_type)
+    if isinstance(new_type, Enum):
+        new_type = new_type.value
+    if new_type != current_type:
+        raise RevisitError(message=f"Cannot change type from {current_type} to {new_type}")
+
+    updates = {key: value for key, value in kwargs.items() if key not in ('type', 'base')}
+    return __response__(**{**vars(current), **updates})
+
+
+# Parses a CSV file into a DataFrame with one type per column. Cells are read as
+# strings and every column is converted with the same rules as _convert_value,
+# kept as strings when its values do not all convert to the same type.
+def _data_columnar(file_path: str) -> pd.DataFrame:
+    try:
+        data_frame = pd.read_csv(file_path, keep_default_na=False, dtype=str)
+    except pd.errors.EmptyDataError:
+        raise RevisitError(message="No headers found in CSV file.")
+
+    return _convert_columns(data_frame)
+
+
+# File types that store typed columns and are read without string conversion
+_TYPED_DATA_SUFFIXES = {
+    '.parquet': 'parquet',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+
+
+def _is_typed_data_file(file_path) -> bool:
+    return os.path.splitext(os.fspath(file_path))[1].lower() in _TYPED_DATA_SUFFIXES
+
+
+def _read_typed_data(file_path) -> pd.DataFrame:
+    file_format = _TYPED_DATA_SUFFIXES[os.path.splitext(os.fspath(file_path))[1].lower()]
+    if file_format == 'jsonl':
+        return pd.read_json(file_path, lines=True, convert_dates=False)
+
+    pa = _import_pyarrow()
+    if file_format == 'parquet':
+        return pa.parquet.read_table(file_path, memory_map=True).to_pandas()
+    return _read_arrow_table(pa, file_path).to_pandas()
+
+
+# Yields DataFrames of at most chunksize rows from a DataFrame or typed data file
+def _iter_typed_data(file_path, chunksize: int) -> Iterator[pd.DataFrame]:
+    if isinstance(file_path, pd.DataFrame):
+        for start in range(0, len(file_path), chunksize):
+            yield file_path.iloc[start:start + chunksize]
+        return
+
+    file_format = _TYPED_DATA_SUFFIXES[os.path.splitext(os.fspath(file_path))[1].lower()]
+    if file_format == 'jsonl':
+        with pd.read_json(file_path, lines=True, convert_dates=False, chunksize=chunksize) as reader:
+            yield from reader
+        return
+
+    pa = _import_pyarrow()
+    if file_format == 'parquet':
+        parquet_file = pa.parquet.ParquetFile(file_path, memory_map=True)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        # Slices of a memory-mapped table do not copy the underlying data
+        table = _read_arrow_table(pa, file_path)
+        for start in range(0, table.num_rows, chunksize):
+            yield table.slice(start, chunksize).to_pandas()
+
+
+def _read_arrow_table(pa, file_path):
+    source = pa.memory_map(os.fspath(file_path), 'r')
+    try:
+        return pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        # Arrow IPC stream format instead of file format
+        source.seek(0)
+        return pa.ipc.open_stream(source).read_all()
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RevisitError(
+            message='Reading Parquet and Arrow files requires "pyarrow". Install it with "pip install revisitpy[arrow]".'
+        )
+    return pyarrow
+
+
+# Converts every column to one type. Column types inferred elsewhere (e.g. over a
+# whole file) can be given; otherwise they are inferred from this data frame.
+def _convert_columns(data_frame: pd.DataFrame, column_types: Optional[dict] = None) -> pd.DataFrame:
+    for column in data_frame.columns:
+        column_type = column_types[column] if column_types is not None else _column_type(data_frame[column])
+        data_frame[column] = _apply_column_type(data_frame[column], column_type)
+    return data_frame
+
+
+# The type every value of a string column converts to with the rules of
+# _convert_value: 'bool', 'int64', 'float64', or 'str' when they do not agree.
+def _column_type(column: pd.Series) -> str:
+    column = column.str.strip()
+    if len(column) > 0 and column.str.lower().isin(['true', 'false']).all():
+        return 'bool'
+
+    has_dot = column.str.contains('.', regex=False)
+    try:
+        if not has_dot.any():
+            column.astype('int64')
+            return 'int64'
+        # Values without a decimal point must still be valid integers
+        column[~has_dot].astype('int64')
+        column.astype('float64')
+        return 'float64'
+    except (ValueError, OverflowError):
+        return 'str'
+
+
+# The type of a column made of two parts with the given types
+def _merge_column_types(first: str, second: str) -> str:
+    if first == second:
+        return first
+    if {first, second} == {'int64', 'float64'}:
+        return 'float64'
+    return 'str'
+
+
+def _apply_column_type(column: pd.Series, column_type: str) -> pd.Series:
+    column = column.str.strip()
+    if column_type == 'bool':
+        return column.str.lower() == 'true'
+    if column_type == 'str':
+        return column
+    return column.astype(column_type)
+
+
+# Returns a bounded LRU-cached version of _convert_value for one column.
+# Converted strings are optionally interned so equal values share memory.
+def _make_column_converter(cache_size: int, intern: bool):
+    def convert(value: str) -> Any:
+        converted = _convert_value(value)
+        if intern and isinstance(converted, str):
+            return sys.intern(converted)
+        return converted
+
+    if cache_size == 0:
+        return convert
+    return functools.lru_cache(maxsize=cache_size)(convert)
+
+
+def _report_conversion_cache(converters: dict):
+    for column, converter in converters.items():
+        if not hasattr(converter, 'cache_info'):
+            print(f'{column}: conversion cache disabled')
+            continue
+        info = converter.cache_info()
+        total = info.hits + info.misses
+        hit_rate = info.hits / total if total else 0
+        print(f'{column}: {hit_rate:.1%} conversion cache hit rate ({info.hits} hits, {info.misses} misses)')
+
+
 def _extract_datum_value(text: str) -> str:
     # Use regex to match 'datum:thing' and capture 'thing'
     match = re.match(r'^datum:(\w+)$', text)
@@ -854,76 +1679,395 @@ def _extract_datum_value(text: str) -> str:
     return None  # Return None if the pattern doesn't match
 
 
-def _copy_file(src: str, dest: str):
+# Finds every file referenced by the component "path", "helpTextPath" and
+# "logoPath" attributes of a study's output. Each distinct source file gets one
+# asset whose name is prefixed with a hash of its absolute path, so files with the
+# same name in different folders do not overwrite each other. Names are kept in
+# asset_names for later calls. Returns the assets and, for every reference, the
+# keys of the path in the output and the asset it points to.
+def _plan_assets(config: dict, asset_names: Dict[tuple, str]) -> dict:
+    assets = {}
+    references = []
+
+    def add_reference(keys: tuple, asset_type: str) -> None:
+        src = _get_nested(config, keys)
+        # React components are staged into their own folder
+        key = (os.path.abspath(src), asset_type == 'react-component')
+        if key not in asset_names:
+            digest = hashlib.blake2b(key[0].encode(), digest_size=8).hexdigest()
+            asset_names[key] = f"{digest}-{os.path.basename(src)}"
+        if key not in assets:
+            assets[key] = {'type': asset_type, 'src': src, 'name': asset_names[key]}
+        references.append((keys, assets[key]))
+
+    base_components = config.get('baseComponents', {})
+    all_components = [(('components', name), c) for name, c in config['components'].items()]
+    all_components.extend((('baseComponents', name), c) for name, c in base_components.items())
+
+    for component_keys, component in all_components:
+        if component.get('path') is not None:
+            component_type = component.get('type')
+            # Inherited components take their type from the base component
+            if component_type is None and component.get('baseComponent') in base_components:
+                component_type = base_components[component['baseComponent']].get('type')
+            add_reference((*component_keys, 'path'), component_type)
+
+    uiConfig = config['uiConfig']
+    if uiConfig.get('helpTextPath') is not None:
+        add_reference(('uiConfig', 'helpTextPath'), 'helpTextPath')
+    if uiConfig.get('logoPath') is not None:
+        add_reference(('uiConfig', 'logoPath'), 'logoPath')
+
+    return {'assets': list(assets.values()), 'references': references}
+
+
+def _get_nested(value: dict, keys: tuple):
+    for key in keys:
+        value = value[key]
+    return value
+
+
+# Manifest of the staged assets, kept outside the served folders since it lists
+# local source paths. Each entry records the size and modification time of a
+# staged file and of its source, and the content hash of the staged file once it
+# has been needed.
+_ASSET_MANIFEST = os.path.join('.revisit-widget', 'asset-manifest.json')
+
+
+# Stages every asset whose destination does not already hold the same bytes.
+# A source whose size and modification time match the manifest is not re-read,
+# and an asset shared by many components is only staged once. Files are staged
+# in a thread pool since the work is almost entirely file system calls.
+def _stage_assets(
+    items: List[dict],
+    manifest_root: str,
+    link_mode: Literal['copy', 'hardlink', 'symlink'] = 'copy',
+    workers: Optional[int] = None
+) -> None:
+    start = time.perf_counter()
+
+    # The last source given for a destination is the one staged there
+    sources = {item['dest']: item['src'] for item in items}
+    for src in set(sources.values()):
+        if not os.path.exists(src):
+            raise RevisitError(message=f'File "{src}" not found.')
+    manifest_path = os.path.join(manifest_root, _ASSET_MANIFEST)
+    manifest = _read_asset_manifest(manifest_path)
+
+    # Sources staged to several destinations are only hashed once
+    hash_source = functools.lru_cache(maxsize=None)(_hash_file)
+
+    def stage(dest: str) -> tuple:
+        src = sources[dest]
+        dest_path = os.path.abspath(dest)
+        src_stat = os.stat(src)
+        entry = manifest.get(dest_path)
+        src_path = os.path.abspath(src)
+
+        if entry is None or entry.get('link_mode', 'copy') != link_mode or not _file_matches(dest, entry):
+            staged, digest = True, None
+        elif entry['src'] == src_path and entry['src_size'] == src_stat.st_size \
+                and entry['src_mtime'] == src_stat.st_mtime_ns:
+            staged, digest = False, entry['hash']
+        else:
+            # The source was touched or replaced, so compare the contents.
+            # Staged files are only hashed once this comparison is needed.
+            digest = hash_source(src)
+            staged = digest != (entry['hash'] or _hash_file(dest))
+        # 'linked' or 'copied', since hard links fall back to copying
+        action = _copy_file(src, dest, link_mode) if staged else None
+
+        dest_stat = os.stat(dest)
+        return dest_path, action, src_stat.st_size, {
+            'hash': digest,
+            'size': dest_stat.st_size,
+            'mtime': dest_stat.st_mtime_ns,
+            'src': src_path,
+            'src_size': src_stat.st_size,
+            'src_mtime': src_stat.st_mtime_ns,
+            'link_mode': link_mode,
+        }
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(stage, sources))
+
+    counts = {'copied': 0, 'linked': 0, None: 0}
+    sizes = {'copied': 0, 'linked': 0, None: 0}
+    for dest_path, action, size, entry in results:
+        manifest[dest_path] = entry
+        counts[action] += 1
+        sizes[action] += size
+
+    _write_asset_manifest(manifest_path, manifest)
+
+    linked = '' if link_mode == 'copy' else f'linked {counts["linked"]} files ({sizes["linked"]} bytes), '
+    print(
+        f'Copied {counts["copied"]} files ({sizes["copied"]} bytes), {linked}'
+        f'skipped {counts[None]} unchanged files ({sizes[None]} bytes). '
+        f'Staged {len(results)} assets in {time.perf_counter() - start:.2f}s.'
+    )
+
+
+def _read_asset_manifest(manifest_path: str) -> dict:
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        # A missing or unreadable manifest only means every asset is copied again
+        return {}
+
+
+def _write_asset_manifest(manifest_path: str, manifest: dict) -> None:
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, mode='w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+
+
+def _hash_file(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+# Whether a staged file is still the one recorded in the manifest
+def _file_matches(path: str, entry: dict) -> bool:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime']
+
+
+# Stages src at dest and returns 'linked' or 'copied' for what was actually done
+def _copy_file(src: str, dest: str, link_mode: Literal['copy', 'hardlink', 'symlink'] = 'copy') -> str:
     # Check if file exists
     if not os.path.exists(src):
         raise RevisitError(message=f'File "{src}" not found.')
 
     os.makedirs(os.path.dirname(dest), exist_ok=True)
 
-    print(f'Copying file from {src} to {dest}')
-    shutil.copyfile(src, dest)
+    # Replace rather than write through a link left by an earlier link_mode
+    if os.path.lexists(dest):
+        os.unlink(dest)
 
+    if link_mode == 'symlink':
+        os.symlink(os.path.abspath(src), dest)
+        return 'linked'
+    if link_mode == 'hardlink':
+        try:
+            os.link(src, dest)
+            return 'linked'
+        except OSError:
+            # Hard links cannot cross file systems
+            pass
+    if not _reflink_file(src, dest):
+        # Uses os.sendfile where the platform supports it
+        shutil.copyfile(src, dest)
+    return 'copied'
+
+
+# Clones src into dest without copying data on copy-on-write file systems
+# (Btrfs, XFS). Returns False when cloning is not supported.
+def _reflink_file(src: str, dest: str) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
 
-def _recursive_json_permutation(
-    input_json: dict,
-    factors: List[str],
+    FICLONE = 0x40049409
+    try:
+        with open(src, 'rb') as src_file, open(dest, 'wb') as dest_file:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+        return True
+    except OSError:
+        if os.path.exists(dest):
+            os.unlink(dest)
+        return False
+
+
+def _map_sequence_tree(root: rvt_models.ComponentBlock, map_leaf) -> rvt_models.ComponentBlock:
+    """Copies a sequence tree, replacing every component name with map_leaf(name).
+
+    Blocks are walked with an explicit stack in their original order, so deeply
+    nested sequences do not hit the recursion limit and each block is copied once.
+    """
+    new_root = root.model_copy(update={'components': []})
+    stack = [(iter(root.components), new_root.components)]
+    while stack:
+        items, new_items = stack[-1]
+        for item in items:
+            if isinstance(item, str):
+                new_items.append(map_leaf(item))
+            elif isinstance(item, rvt_models.ComponentBlock):
+                new_block = item.model_copy(update={'components': []})
+                new_items.append(new_block)
+                stack.append((iter(item.components), new_block.components))
+                break
+            else:
+                # Dynamic blocks have no component names to replace
+                new_items.append(item)
+        else:
+            stack.pop()
+    return new_root
+
+
+def _iter_sequence_leaves(root: rvt_models.ComponentBlock) -> Iterator[str]:
+    # Component names in the order _map_sequence_tree visits them
+    stack = [iter(root.components)]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, str):
+                yield item
+            elif isinstance(item, rvt_models.ComponentBlock):
+                stack.append(iter(item.components))
+                break
+        else:
+            stack.pop()
+
+
+def _permute_sequence_tree(root: rvt_models.ComponentBlock, plan: List[dict]) -> tuple:
+    # Until the last step, every permuted component is only the copy it is created
+    # from, the component it inherits from and its metadata
+    specs = {name: (pair, _unwrap_root(pair[0].root).meta) for name, pair in plan[0]['sources'].items()}
+    for step in plan:
+        root, specs = _permute_sequence_step(
+            root,
+            specs,
+            levels=step['levels'],
+            order=step['order'],
+            naming=step['naming'],
+            numSamples=step['numSamples'],
+            make_comp_block=step['make_comp_block']
+        )
+
+    # Components repeated in the sequence are only created once
+    leaves = [c for c in _iter_sequence_leaves(root) if c in specs]
+    names_by_base = {}
+    for c in dict.fromkeys(leaves):
+        source, base = specs[c][0]
+        names_by_base.setdefault(id(source), (source, base, []))[2].append(c)
+
+    # Every component shares its source's validated state; only the metadata is set
+    created = {}
+    for source, base, names in names_by_base.values():
+        created.update(zip(names, _derive_components(
+            source,
+            base,
+            names,
+            [specs[c][1] for c in names],
+            inherit=plan[-1]['inherit']
+        )))
+    return root, [created[c] for c in leaves]
+
+
+def _permute_sequence_step(
+    root: rvt_models.ComponentBlock,
+    specs: dict,
+    levels: List[List[dict]],
     order: rvt_models.Order,
-    input_components: dict,
     numSamples: Optional[int] = None,
+    naming: Literal['verbose', 'hash', 'index'] = 'verbose',
     make_comp_block=True
-):
-    new_seq = __sequence__(order=input_json['order'], numSamples=input_json.get('numSamples'))
-    while input_json['components']:
-        c = input_json['components'].pop()
-        # If component name
-        if isinstance(c, str):
-            # Get orig component
-            curr_comp = input_components[c]
-            # Create new comp block for permuting this component across all factors
-            curr_seq = __sequence__(order=order, numSamples=numSamples)
-            # Generate new comp for each
-            for entry in factors:
+) -> tuple:
+    new_specs = {}
+    permuted = {}
+
+    def permute_leaf(c):
+        if c not in specs:
+            return c
+        # Components repeated in the sequence are only permuted once
+        if c in permuted:
+            return permuted[c].model_copy(deep=True)
+        base, curr_meta = specs[c]
+        indices = itertools.count()
+
+        # New comp block for permuting this component across the entries of one level
+        def permute_level(depth, prefix):
+            components = []
+            innermost = depth == len(levels) - 1
+            for entry in levels[depth]:
+                factors = {**prefix, **entry}
+                if not innermost:
+                    components.append(permute_level(depth + 1, factors))
+                    continue
                 # Assign params
-                metadata = entry
-                if curr_comp.root.meta is not None:
-                    metadata = {**curr_comp.root.meta, **entry}
-                # Create new component
-                comp_name = "_".join(f"{key}:{value}" for key, value in entry.items())
-
-                new_comp = __component__(
-                    base__=curr_comp,
-                    component_name__=f"{c}__{comp_name}",
-                    meta=metadata
-                )
-                # Add to curr seq block
-                curr_seq = curr_seq + new_comp
-            # Add seq block to outer seq block
-        else:
-            new_input_json = c
-            temp_num_samples = None
-            if new_input_json.get('numSamples') is not None:
-                temp_num_samples = new_input_json['numSamples']
-
-            curr_seq = _recursive_json_permutation(
-                input_json=new_input_json,
+                metadata = factors
+                if curr_meta is not None:
+                    metadata = {**curr_meta, **factors}
+                comp_name = _factor_name(factors, naming, next(indices))
+                new_specs[f"{c}__{comp_name}"] = (base, metadata)
+                components.append(f"{c}__{comp_name}")
+            return rvt_models.ComponentBlock(
                 order=order,
-                numSamples=numSamples,
-                input_components=input_components,
-                factors=factors
+                numSamples=numSamples if innermost else None,
+                components=components
             )
-            curr_seq.root.order = new_input_json['order']
-            curr_seq.root.numSamples = temp_num_samples
-        new_seq = new_seq + curr_seq
 
-    # Only return curr sequence if not making the comp block.
-    if make_comp_block is True:
-        return new_seq
+        permuted[c] = permute_level(0, {})
+        return permuted[c]
+
+    new_root = _map_sequence_tree(root, permute_leaf)
+    # Only return the permuted block of a single component without the outer block.
+    if make_comp_block is False and len(new_root.components) == 1 \
+            and isinstance(new_root.components[0], rvt_models.ComponentBlock):
+        new_root = new_root.components[0]
+    return new_root, new_specs
+
+
+# Models that are written field by field when streaming. Any other value is
+# small enough to be serialized in one piece.
+_STREAMED_MODELS = (rvt_models.StudyConfig, rvt_models.ComponentBlock)
+
+
+def _write_json_chunks(handle, value, indent: Optional[int] = None):
+    for chunk in _iter_json_chunks(value, indent):
+        handle.write(chunk)
+
+
+# Yields the JSON encoding of value in pieces. Produces the same output as
+# to_json() with the same indent.
+def _iter_json_chunks(value, indent: Optional[int] = None, level: int = 0):
+    if isinstance(value, _STREAMED_MODELS):
+        items = (
+            (field.alias or name, getattr(value, name))
+            for name, field in type(value).model_fields.items()
+        )
+        yield from _iter_json_container(
+            ((key, item) for key, item in items if item is not None), indent, level, '{', '}'
+        )
+    elif isinstance(value, dict):
+        yield from _iter_json_container(value.items(), indent, level, '{', '}')
+    elif isinstance(value, list):
+        yield from _iter_json_container(((None, item) for item in value), indent, level, '[', ']')
+    else:
+        dumped = to_json(value, indent=indent, exclude_none=True, by_alias=True).decode()
+        if indent is not None and level > 0:
+            dumped = dumped.replace('\n', '\n' + ' ' * (indent * level))
+        yield dumped
+
+
+def _iter_json_container(items, indent, level, open_char, close_char):
+    if indent is None:
+        separator, key_separator, newline, closing = ',', ':', '', ''
     else:
-        return curr_seq
+        separator, key_separator = ',', ': '
+        newline = '\n' + ' ' * (indent * (level + 1))
+        closing = '\n' + ' ' * (indent * level)
+
+    yield open_char
+    empty = True
+    for key, item in items:
+        prefix = newline if empty else separator + newline
+        if key is not None:
+            prefix += to_json(key).decode() + key_separator
+        yield prefix
+        yield from _iter_json_chunks(item, indent, level + 1)
+        empty = False
+    yield close_char if empty else closing + close_char
 
 
 def _func_takes_keyword_or_arbitrary(func, keyword):
+    if not callable(func):
+        raise RevisitError(message=f"{func} is not a callable function.")
     try:
         sig = inspect.signature(func)
         # Check for explicit parameters
@@ -935,34 +2079,108 @@ def _func_takes_keyword_or_arbitrary(func, keyword):
             if param.kind == inspect.Parameter.VAR_KEYWORD:
                 return True  # Function accepts **kwargs
         return False
-    except ValueError:
+    except (ValueError, TypeError):
         raise RevisitError(message=f"{func} is not a callable function.")
 
 
-def _recursive_map(input_json, input_components, component_function):
-    new_seq = __sequence__(order=input_json['order'], numSamples=input_json.get('numSamples'))
-    while input_json['components']:
-        c = input_json['components'].pop()
-
-        if isinstance(c, str):
-            curr_comp = input_components[c]
-            metadata = curr_comp.root.meta
-            # Create new comp block for permuting this component across all factors
-            # curr_seq = __sequence__(order=order, numSamples=numSamples)
-            try:
-                can_take_component_ = _func_takes_keyword_or_arbitrary(component_function, 'component__')
-                if can_take_component_:
-                    # Passes in curr_comp
-                    new_comp = component_function(**metadata, component__=curr_comp)
-                else:
-                    new_comp = component_function(**metadata)
-            except Exception:
-                new_comp = curr_comp
-
-            new_seq = new_seq + new_comp
+def _map_components(
+    root: rvt_models.ComponentBlock,
+    input_components: dict,
+    component_function,
+    workers: Optional[int] = None,
+    executor: Literal['thread', 'process'] = 'thread',
+    cache_size: Optional[int] = 0,
+    report: bool = False
+) -> tuple:
+    # Library components are kept as they are
+    leaves = [input_components[c] for c in _iter_sequence_leaves(root) if c in input_components]
+
+    can_take_component_ = _func_takes_keyword_or_arbitrary(component_function, 'component__')
+    apply = functools.partial(_apply_component_function, component_function, can_take_component_)
+
+    # Only one call is made for each distinct input held in the cache
+    if cache_size != 0:
+        keys = [_component_function_key(leaf, can_take_component_) for leaf in leaves]
+        calls, slots = _memoize_calls(leaves, keys, cache_size)
+        if report:
+            hits, misses = len(leaves) - len(calls), len(calls)
+            hit_rate = hits / len(leaves) if leaves else 0
+            print(f'component_function: {hit_rate:.1%} cache hit rate ({hits} hits, {misses} misses)')
+    else:
+        calls, slots = leaves, range(len(leaves))
+        if report:
+            print('component_function: cache disabled')
+
+    if executor not in ('thread', 'process'):
+        raise RevisitError(message=f'Unknown executor "{executor}". Use "thread" or "process".')
+    if workers is None or workers <= 1 or len(calls) <= 1:
+        results = list(map(apply, calls))
+    elif executor == 'thread':
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(apply, calls))
+    else:
+        # Components and the function are pickled, so send them in batches
+        chunksize = max(1, len(calls) // (workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(apply, calls, chunksize=chunksize))
+
+    # Components whose call failed are kept as they are
+    new_components = [
+        leaf if results[slot] is None else results[slot]
+        for leaf, slot in zip(leaves, slots)
+    ]
+
+    # Leaves are visited in the same order when rebuilding the tree
+    new_names = iter([comp.component_name__ for comp in new_components])
+    new_root = _map_sequence_tree(root, lambda c: next(new_names) if c in input_components else c)
+    return new_root, new_components
+
+
+# Canonical hash of the arguments component_function is called with. The
+# component is only part of the key when it is passed in as component__.
+def _component_function_key(curr_comp: _WrappedComponent, can_take_component_: bool) -> str:
+    metadata = _unwrap_root(curr_comp.root).meta
+    key = [metadata, curr_comp.component_name__] if can_take_component_ else [metadata]
+    return hashlib.sha256(_canonical_json(key).encode()).hexdigest()
+
+
+def _canonical_json(value) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), default=repr)
+
+
+# Replays the calls through a least recently used cache of cache_size keys
+# (unbounded when None). Returns the components to call the function with and,
+# for every component, the index of the call whose result it uses.
+def _memoize_calls(leaves: list, keys: List[str], cache_size: Optional[int]) -> tuple:
+    cache = collections.OrderedDict()
+    calls = []
+    slots = []
+    for leaf, key in zip(leaves, keys):
+        slot = cache.get(key)
+        if slot is None:
+            slot = len(calls)
+            calls.append(leaf)
+            cache[key] = slot
+            if cache_size is not None and len(cache) > cache_size:
+                cache.popitem(last=False)
+        else:
+            cache.move_to_end(key)
+        slots.append(slot)
+    return calls, slots
+
+
+def _apply_component_function(component_function, can_take_component_: bool, curr_comp: _WrappedComponent):
+    metadata = _unwrap_root(curr_comp.root).meta
+    try:
+        if can_take_component_:
+            # Passes in curr_comp
+            new_comp = component_function(**metadata, component__=curr_comp)
         else:
-            new_input_json = c
-            curr_seq = _recursive_map(new_input_json, input_components, component_function)
-            new_seq = new_seq + curr_seq
+            new_comp = component_function(**metadata)
+    except Exception:
+        # The original component is used in its stead
+        return None
 
-    return new_seq
+    if not isinstance(new_comp, _WrappedComponent):
+        raise RevisitError(message=f'"component_function" returned {type(new_comp)} instead of a component.')
+    return new_comp
@@ -17,6 +17,22 @@ class Widget(anywidget.AnyWidget):
     sequence = traitlets.List([]).tag(sync=True)
     participants_data_json = traitlets.List([]).tag(sync=True)
     participants_data_tidy = traitlets.Dict({}).tag(sync=True)
+    # Builds the configuration of a study; set by revisitpy.widget()
+    _build_config = None
+
+    def update_study(self, study) -> list:
+        """Sends only the changes between the shown configuration and the given study.
+
+        Returns the JSON patch (RFC 6902) that was sent.
+        """
+        new_config = self._build_config(study) if self._build_config is not None else study.to_dict()
+        patch = _json_patch(self.config, new_config)
+        if patch:
+            # Updated in place so the full configuration is not synced again
+            self.config.clear()
+            self.config.update(new_config)
+            self.send({'type': 'revisitWidget/CONFIG_PATCH', 'patch': patch})
+        return patch
 
     def get_df(self):
         # Extract rows and headers
@@ -25,3 +41,40 @@ class Widget(anywidget.AnyWidget):
 
         # Create DataFrame
         return pd.DataFrame(rows, columns=header)
+
+
+# Returns the JSON patch operations turning old into new. Objects and lists of
+# the same length are compared item by item; items are added or removed at the
+# end of lists whose length changed.
+def _json_patch(old, new) -> list:
+    patch = []
+    stack = [('', old, new)]
+    while stack:
+        path, old_value, new_value = stack.pop()
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            for key in old_value.keys() - new_value.keys():
+                patch.append({'op': 'remove', 'path': f'{path}/{_escape_pointer(key)}'})
+            for key, value in new_value.items():
+                if key not in old_value:
+                    patch.append({'op': 'add', 'path': f'{path}/{_escape_pointer(key)}', 'value': value})
+                # Python equality treats 1 and True as equal, so only identical
+                # values are skipped and the rest are compared with their types
+                elif old_value[key] is not value:
+                    stack.append((f'{path}/{_escape_pointer(key)}', old_value[key], value))
+        elif isinstance(old_value, list) and isinstance(new_value, list):
+            common = min(len(old_value), len(new_value))
+            for i in range(common):
+                if old_value[i] is not new_value[i]:
+                    stack.append((f'{path}/{i}', old_value[i], new_value[i]))
+            # Removed from the end first so the remaining indices stay valid
+            for i in reversed(range(common, len(old_value))):
+                patch.append({'op': 'remove', 'path': f'{path}/{i}'})
+            for i in range(common, len(new_value)):
+                patch.append({'op': 'add', 'path': f'{path}/{i}', 'value': new_value[i]})
+        elif old_value != new_value or type(old_value) is not type(new_value):
+            patch.append({'op': 'replace', 'path': path, 'value': new_value})
+    return patch
+
+
+def _escape_pointer(key) -> str:
+    return str(key).replace('~', '~0').replace('/', '~1')
@@ -0,0 +1,21 @@
+import pathlib
+
+# The widget front end is built by "yarn build" into src/revisitpy/static.
+# Without a build, empty placeholders let the package import during tests.
+# They are removed afterwards so a later "hatch build" still runs the JS build.
+STATIC_DIR = pathlib.Path(__file__).parents[1] / 'src' / 'revisitpy' / 'static'
+_placeholders = []
+
+
+def pytest_configure(config):
+    STATIC_DIR.mkdir(exist_ok=True)
+    for name in ['widget.js', 'widget.css']:
+        path = STATIC_DIR / name
+        if not path.exists():
+            path.touch()
+            _placeholders.append(path)
+
+
+def pytest_unconfigure(config):
+    for path in _placeholders:
+        path.unlink(missing_ok=True)
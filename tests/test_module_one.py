@@ -1,6 +1,16 @@
 import revisitpy.revisitpy as rvt
 import unittest
+import unittest.mock
 import json
+import io
+import contextlib
+import gzip
+import os
+import shutil
+import tempfile
+import importlib.util
+import pandas as pd
+from dataclasses import make_dataclass, asdict
 
 
 class TestComponentsAndResponses(unittest.TestCase):
@@ -48,7 +58,700 @@ class TestComponentsAndResponses(unittest.TestCase):
             {'answerOptions': 'likely-7', 'id': 'first-response', 'prompt': 'Fake Prompt', 'questionOptions': ['Question One', 'Question Two', 'Question Three'], 'required': True, 'type': 'matrix-checkbox'}
         )
 
-    
+    def test_edit_responses_preserves_order(self):
+        comp = rvt.component(
+            type='questionnaire',
+            response=[
+                rvt.response(id=f'q{i}', type='shortText', prompt=f'Prompt {i}')
+                for i in range(4)
+            ],
+            component_name__='Base_Test'
+        )
+
+        comp.edit_response(id='q1', prompt='Edited 1')
+        comp.edit_responses({'q0': {'prompt': 'Edited 0'}, 'q3': {'required': True}})
+
+        self.assertEqual(
+            [r.root.id for r in comp.root.response],
+            ['q0', 'q1', 'q2', 'q3']
+        )
+        self.assertEqual(comp.get_response('q0').root.prompt, 'Edited 0')
+        self.assertEqual(comp.get_response('q1').root.prompt, 'Edited 1')
+        self.assertEqual(comp.get_response('q3').root.required, True)
+        self.assertIsNone(comp.get_response('missing'))
+
+        with self.assertRaises(ValueError):
+            comp.edit_responses({'q0': {'prompt': 'Unused'}, 'missing': {}})
+        self.assertEqual(comp.get_response('q0').root.prompt, 'Edited 0')
+
+        with self.assertRaises(rvt.RevisitError):
+            comp.edit_response(id='q2', type='longText')
+
+        # Renamed responses are found under their new ID
+        comp.edit_responses({'q1': {'id': 'q9'}})
+        self.assertEqual(comp.get_response('q9').root.prompt, 'Edited 1')
+        self.assertIsNone(comp.get_response('q1'))
+
+    def test_component_batch(self):
+        base = rvt.component(
+            type='image',
+            path='./assets/base.png',
+            response=[rvt.response(id='q', type='shortText', prompt='Prompt')],
+            meta={'task': 'compare'},
+            component_name__='Base_Test'
+        )
+
+        batch = rvt.component_batch(
+            base__=base,
+            names=['trial_1', 'trial_2'],
+            meta=[{'level': 1}, {'level': 2}],
+            fields={'path': ['./assets/one.png', './assets/two.png']}
+        )
+
+        self.assertEqual([c.component_name__ for c in batch], ['trial_1', 'trial_2'])
+        self.assertEqual(batch[1].to_dict()['path'], './assets/two.png')
+        self.assertEqual(batch[1].root.meta, {'task': 'compare', 'level': 2})
+        self.assertEqual(base.root.path, './assets/base.png')
+
+        # Editing one component does not affect the others
+        batch[0].edit_response(id='q', prompt='Edited')
+        self.assertEqual(batch[1].get_response('q').root.prompt, 'Prompt')
+
+        # Wrapped responses and answers can be passed per component
+        batch = rvt.component_batch(
+            base__=base,
+            names=['r_1', 'r_2'],
+            fields={
+                'response': [
+                    [rvt.response(id='q1', type='shortText', prompt='One')],
+                    [rvt.response(id='q2', type='shortText', prompt='Two')]
+                ],
+                'correctAnswer': [[rvt.answer(id='q1', answer='a')], [rvt.answer(id='q2', answer='b')]]
+            }
+        )
+        self.assertEqual(batch[1].to_dict()['response'][0]['prompt'], 'Two')
+        self.assertEqual(batch[1].to_dict()['correctAnswer'], [{'id': 'q2', 'answer': 'b'}])
+        self.assertEqual(batch[0].get_response('q1').root.prompt, 'One')
+
+        seq = rvt.component_batch(base__=base, names=['a', 'b'], order='random')
+        self.assertEqual(seq.root.components, ['a', 'b'])
+
+        with self.assertRaises(rvt.RevisitError):
+            rvt.component_batch(base__=base, names=['a', 'b'], meta=[{'level': 1}])
+
+    def test_overlay_inheritance(self):
+        base = rvt.component(
+            type='questionnaire',
+            response=[rvt.response(id='q', type='shortText', prompt='Prompt')],
+            component_name__='Base_Test'
+        )
+
+        overlay = rvt.component(base__=base, component_name__='Overlay', meta={'i': 1}, inherit__='overlay')
+        copied = rvt.component(base__=base, component_name__='Copied', meta={'i': 1})
+
+        self.assertEqual(overlay.to_dict(), copied.to_dict())
+        self.assertEqual(overlay.overrides__, ['meta'])
+        self.assertIs(overlay.root.response, base.root.response)
+
+        # Editing an overlay copies the shared list first
+        overlay.edit_response(id='q', prompt='Edited')
+        self.assertEqual(base.get_response('q').root.prompt, 'Prompt')
+        self.assertEqual(overlay.overrides__, ['meta', 'response'])
+
+        # Editing the base copies the shared list too
+        shared = rvt.component(base__=base, component_name__='Shared', meta={'i': 2}, inherit__='overlay')
+        rows = rvt.sequence(order='fixed', components=[base]).from_data(pd.DataFrame({'i': [1, 2]}), inherit='overlay')
+        base.edit_response(id='q', prompt='Base Edit')
+        self.assertEqual(shared.get_response('q').root.prompt, 'Prompt')
+        self.assertEqual([c.get_response('q').root.prompt for c in rows.get_components()], ['Prompt', 'Prompt'])
+        self.assertEqual(base.get_response('q').root.prompt, 'Base Edit')
+
+        with self.assertRaises(rvt.RevisitError):
+            rvt.component(base__=base, component_name__='Other', type='markdown', inherit__='overlay')
+
+        seq = rvt.sequence(order='fixed', components=[base])
+        seq.permute(factors=[{'size': 1}, {'size': 2}], order='fixed', inherit='overlay')
+        self.assertEqual(seq.get_component('Base_Test__size:2').overrides__, ['meta'])
+
+        # Unknown inheritance modes are rejected instead of falling back to copy
+        with self.assertRaises(rvt.RevisitError):
+            rvt.component(base__=base, component_name__='Typo', inherit__='overlayy')
+        with self.assertRaises(rvt.RevisitError):
+            seq.permute(factors=[{'size': 3}], order='fixed', inherit='overlayy')
+        with self.assertRaises(rvt.RevisitError):
+            seq.factorial({'size': [3]}, order='fixed', inherit='overlayy')
+        with self.assertRaises(rvt.RevisitError):
+            seq.from_data([{'size': 3}], inherit='overlayy')
+
+    def make_study(self, seq, dedupe=None):
+        return rvt.studyConfig(
+            schema='schema',
+            studyMetadata=rvt.studyMetadata(
+                title='Title', version='1', authors=['Author'], date='2025-01-01',
+                description='Description', organizations=['Organization']
+            ),
+            uiConfig=rvt.uiConfig(
+                contactEmail='test@test.com', logoPath='logo.svg', withProgressBar=True, withSidebar=True
+            ),
+            sequence=seq,
+            dedupe=dedupe
+        ).to_dict()
+
+    # Expands every inherited component of a config into its full fields
+    def expand_components(self, study):
+        base_components = study.get('baseComponents', {})
+        expanded = {}
+        for name, comp in study['components'].items():
+            base = base_components.get(comp.get('baseComponent'), {})
+            expanded[name] = {**base, **{k: v for k, v in comp.items() if k != 'baseComponent'}}
+        return expanded
+
+    def test_inherited_study_config(self):
+        base = rvt.component(
+            type='questionnaire',
+            response=[rvt.response(id='q', type='shortText', prompt='Prompt')],
+            instruction='Answer the question',
+            component_name__='trial'
+        )
+        seq = rvt.sequence(order='fixed', components=[base])
+        seq.permute(factors=[{'size': 1}, {'size': 2}], order='random')
+
+        study = self.make_study(seq, dedupe='inherit')
+
+        self.assertEqual(study['baseComponents']['trial']['instruction'], 'Answer the question')
+        self.assertEqual(
+            study['components']['trial__size:1'],
+            {'baseComponent': 'trial', 'meta': {'size': 1}}
+        )
+
+        # Responses added with responses() or edit_response() are wrapped
+        wrapped = rvt.component(
+            type='questionnaire', response=[], instruction='Answer the question', component_name__='wrapped'
+        ).responses([rvt.response(id='q', type='shortText', prompt='Prompt')])
+        seq = rvt.sequence(order='fixed', components=[wrapped])
+        seq.permute(factors=[{'size': 1}, {'size': 2}], order='fixed')
+        seq.get_component('wrapped__size:1').edit_response(id='q', prompt='Edited')
+        expanded = self.expand_components(self.make_study(seq, dedupe='inherit'))
+        self.assertEqual(expanded['wrapped__size:1']['response'], [{'id': 'q', 'prompt': 'Edited', 'type': 'shortText'}])
+        self.assertEqual(expanded['wrapped__size:2']['response'], [{'id': 'q', 'prompt': 'Prompt', 'type': 'shortText'}])
+
+        similar = [
+            rvt.component(
+                type='questionnaire', response=[], instruction='A long instruction shared by every component',
+                component_name__=f'similar_{i}'
+            ).responses([rvt.response(id='q', type='shortText', prompt='Prompt')])
+            for i in range(4)
+        ]
+        seq = rvt.sequence(order='fixed', components=similar)
+        study = self.make_study(seq, dedupe='inherit')
+        self.assertIn('questionnaire-base', study['baseComponents'])
+        self.assertEqual(
+            self.expand_components(study)['similar_3']['response'],
+            [{'id': 'q', 'prompt': 'Prompt', 'type': 'shortText'}]
+        )
+
+        # Overlays still match their default output after the base is changed
+        overlay = rvt.component(base__=base, component_name__='overlay', meta={'i': 1}, inherit__='overlay')
+        seq = rvt.sequence(order='fixed', components=[overlay])
+        base.root.instruction = 'Changed'
+        study = self.make_study(seq, dedupe='inherit')
+        self.assertEqual(self.expand_components(study), self.make_study(seq)['components'])
+        self.assertEqual(study['components']['overlay']['instruction'], 'Answer the question')
+
+    def test_component_validates_against_concrete_type(self):
+        comp = rvt.component(
+            type='questionnaire',
+            response=[],
+            component_name__='Base_Test'
+        )
+        self.assertIsInstance(comp.root, rvt.rvt_models.QuestionnaireComponent)
+
+        with self.assertRaises(rvt.RevisitError) as ctx:
+            rvt.component(type='markdown', component_name__='Missing_Path')
+        self.assertIn("('MarkdownComponent', 'path')", str(ctx.exception))
+
+    def test_serialization(self):
+        comp = rvt.component(
+            type='markdown',
+            path='./assets/test-path',
+            response=[],
+            component_name__='Base_Test'
+        )
+        expected = {
+            'path': './assets/test-path',
+            'response': [],
+            'type': 'markdown'
+        }
+
+        self.assertEqual(comp.to_dict(), expected)
+        self.assertEqual(json.loads(comp.to_json()), expected)
+        self.assertNotIn('\n', comp.to_json())
+        self.assertEqual(comp.to_json(indent=4), comp.__str__())
+
+
+class TestData(unittest.TestCase):
+    def write_csv(self, contents, suffix='.csv'):
+        temp_file = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False)
+        with temp_file:
+            temp_file.write(contents)
+        self.addCleanup(os.remove, temp_file.name)
+        return temp_file.name
+
+    def test_columnar_engine(self):
+        file_path = self.write_csv('id,flag,value,label,mixed\n1,TRUE,0.5, a ,x\n2,false,2,b,3\n')
+
+        columns = rvt.data(file_path, engine='columnar')
+
+        self.assertEqual(columns['id'].dtype, 'int64')
+        self.assertEqual(columns['flag'].dtype, 'bool')
+        self.assertEqual(columns['value'].dtype, 'float64')
+        self.assertEqual(
+            columns.to_dict(orient='records'),
+            [
+                {'id': 1, 'flag': True, 'value': 0.5, 'label': 'a', 'mixed': 'x'},
+                {'id': 2, 'flag': False, 'value': 2.0, 'label': 'b', 'mixed': '3'},
+            ]
+        )
+
+        rows = rvt.data(file_path)
+        self.assertEqual(rows[1].mixed, 3)
+
+        # Columns use the same conversion rules as rows, not the CSV parser's
+        file_path = self.write_csv('exponent,padded\n1e3,007\n5,010\n')
+        columns = rvt.data(file_path, engine='columnar')
+        rows = rvt.data(file_path)
+        self.assertEqual(columns['exponent'].tolist(), ['1e3', '5'])
+        self.assertEqual(rows[0].exponent, '1e3')
+        self.assertEqual(columns['padded'].tolist(), [row.padded for row in rows])
+
+    def test_conversion_cache(self):
+        file_path = self.write_csv('cond,level\n' + 'abc,1\nxyz,2\n' * 50)
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            rows = rvt.data(file_path, intern=True, report=True)
+
+        self.assertEqual([row.level for row in rows[:4]], [1, 2, 1, 2])
+        self.assertIs(rows[0].cond, rows[2].cond)
+        self.assertIn('cond: 98.0% conversion cache hit rate (98 hits, 2 misses)', output.getvalue())
+
+        uncached = rvt.data(file_path, cache_size=0)
+        self.assertEqual([asdict(row) for row in uncached], [asdict(row) for row in rows])
+
+    def test_typed_inputs(self):
+        frame = pd.DataFrame({'id': [1, 2], 'cond': ['a', 'b'], 'flag': [True, False]})
+        file_path = self.write_csv(frame.to_json(orient='records', lines=True), suffix='.jsonl')
+
+        for source in [frame, file_path]:
+            rows = rvt.data(source)
+            self.assertEqual((rows[1].id, rows[1].cond, rows[1].flag), (2, 'b', False))
+            self.assertEqual(rvt.data(source, engine='columnar').to_dict(orient='records'), frame.to_dict(orient='records'))
+            self.assertEqual([len(chunk) for chunk in rvt.data_iter(source, chunksize=1)], [1, 1])
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_arrow_inputs(self):
+        frame = pd.DataFrame({'id': [1, 2, 3], 'value': [0.5, 1.5, 2.5]})
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        parquet_path = os.path.join(temp_dir, 'data.parquet')
+        arrow_path = os.path.join(temp_dir, 'data.arrow')
+        frame.to_parquet(parquet_path)
+        frame.to_feather(arrow_path)
+
+        for file_path in [parquet_path, arrow_path]:
+            self.assertEqual(rvt.data(file_path)[2].value, 2.5)
+            self.assertEqual(rvt.data(file_path, engine='columnar')['id'].tolist(), [1, 2, 3])
+            self.assertEqual([len(chunk) for chunk in rvt.data_iter(file_path, chunksize=2)], [2, 1])
+
+    def test_data_iter(self):
+        file_path = self.write_csv('id,cond\n' + ''.join(f'{i},c{i % 2}\n' for i in range(5)))
+
+        chunks = list(rvt.data_iter(file_path, chunksize=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(chunks[2][0].id, 4)
+
+        columnar_chunks = list(rvt.data_iter(file_path, chunksize=2, engine='columnar'))
+        self.assertEqual(columnar_chunks[1]['cond'].tolist(), ['c0', 'c1'])
+
+        # Column types do not depend on the chunk size
+        file_path = self.write_csv('level,flag\n1,true\n2,false\n2.5,true\nx,false\n')
+        columnar_chunks = list(rvt.data_iter(file_path, chunksize=2, engine='columnar'))
+        columns = rvt.data(file_path, engine='columnar')
+        self.assertEqual(columnar_chunks[0]['level'].tolist(), ['1', '2'])
+        self.assertEqual(pd.concat(columnar_chunks).to_dict(orient='list'), columns.to_dict(orient='list'))
+        self.assertEqual(columnar_chunks[1]['flag'].dtype, 'bool')
+
+        base = rvt.component(type='markdown', path='one.md', component_name__='trial')
+        from_chunks = rvt.sequence(order='fixed', components=[base]).from_data(
+            rvt.data_iter(file_path, chunksize=2)
+        )
+        from_rows = rvt.sequence(order='fixed', components=[base]).from_data(rvt.data(file_path))
+        self.assertEqual(from_chunks.to_dict(), from_rows.to_dict())
+
+
+class TestComponentBlock(unittest.TestCase):
+    def test_get_component(self):
+        comp_one = rvt.component(type='markdown', path='one.md', component_name__='one')
+        comp_two = rvt.component(type='markdown', path='two.md', component_name__='two')
+        seq = rvt.sequence(order='fixed', components=[comp_one])
+        seq = seq + rvt.sequence(order='random', components=[comp_two])
+
+        self.assertIs(seq.get_component('one'), comp_one)
+        self.assertIs(seq.get_component('two'), comp_two)
+        self.assertIsNone(seq.get_component('three'))
+
+        seq.permute(factors=[{'size': 1}, {'size': 2}], order='fixed')
+        self.assertEqual(seq.get_component('two__size:2').root.meta, {'size': 2})
+        self.assertIsNone(seq.get_component('two'))
+
+    def test_sequence_tree_order(self):
+        comp_one = rvt.component(type='markdown', path='one.md', meta={'task': 'a'}, component_name__='one')
+        comp_two = rvt.component(type='markdown', path='two.md', component_name__='two')
+        seq = rvt.sequence(order='fixed', components=[comp_one, comp_two, '$lib.se.full'])
+        seq.permute(factors=[{'size': 1}, {'size': 2}], order='random')
+
+        self.assertEqual(seq.to_dict()['components'], [
+            {'order': 'random', 'components': ['one__size:1', 'one__size:2']},
+            {'order': 'random', 'components': ['two__size:1', 'two__size:2']},
+            '$lib.se.full'
+        ])
+
+        seq.component(lambda component__, **kwargs: component__.clone(f"{component__.component_name__}_mapped"))
+        self.assertEqual(
+            [c.component_name__ for c in seq.get_components()],
+            ['one__size:1_mapped', 'one__size:2_mapped', 'two__size:1_mapped', 'two__size:2_mapped']
+        )
+
+        # Nesting deeper than the recursion limit
+        deep = rvt.sequence(order='fixed', components=[comp_one])
+        for _ in range(1100):
+            deep = rvt.sequence(order='fixed', components=[comp_two]) + deep
+        deep.permute(factors=[{'size': 1}], order='fixed')
+        self.assertEqual(deep.get_components()[-1].component_name__, 'one__size:1')
+
+    def test_lazy_permute(self):
+        base = rvt.component(type='markdown', path='one.md', meta={'task': 'a'}, component_name__='trial')
+        seq = rvt.sequence(order='fixed', components=[base])
+        seq.permute(factors=[{'size': 1}, {'size': 2}], order='random')
+        seq.permute(factors=[{'color': 'red'}, {'color': 'blue'}], order='fixed', numSamples=1)
+
+        # Nothing is created until the sequence is read
+        self.assertEqual(len(seq._permutation_plan), 2)
+        self.assertEqual(seq.to_dict(), {
+            'order': 'random',
+            'components': [
+                {'order': 'fixed', 'numSamples': 1, 'components': ['trial__size:1__color:red', 'trial__size:1__color:blue']},
+                {'order': 'fixed', 'numSamples': 1, 'components': ['trial__size:2__color:red', 'trial__size:2__color:blue']},
+            ]
+        })
+        self.assertEqual(seq._permutation_plan, [])
+        self.assertEqual(
+            seq.get_component('trial__size:2__color:blue').root.meta,
+            {'task': 'a', 'size': 2, 'color': 'blue'}
+        )
+
+        # Components are permuted as they were when permute was called
+        seq = rvt.sequence(order='fixed', components=[base])
+        seq.permute(factors=[{'size': 1}], order='fixed')
+        base.root.path = 'changed.md'
+        self.assertEqual(seq.model_dump(include={'root'})['root']['components'], ['trial__size:1'])
+        self.assertEqual(seq.get_component('trial__size:1').root.path, 'one.md')
+
+        # Reading the fields directly applies the plan too
+        seq = rvt.sequence(order='fixed', components=[base])
+        seq.permute(factors=[{'size': 1}, {'size': 2}], order='fixed')
+        self.assertEqual(seq.root.components, ['trial__size:1', 'trial__size:2'])
+        self.assertEqual(seq._permutation_plan, [])
+        seq.permute(factors=[{'size': 3}], order='fixed')
+        self.assertEqual(
+            [c.component_name__ for c in seq.component_objects__],
+            ['trial__size:1__size:3', 'trial__size:2__size:3']
+        )
+
+    def test_factorial(self):
+        base = rvt.component(type='markdown', path='one.md', component_name__='trial')
+        seq = rvt.sequence(order='fixed', components=[base])
+        seq.factorial(
+            {'chart': ['bar', 'pie'], 'size': [1, 2], 'color': ['red', 'blue']},
+            order='random',
+            numSamples=2,
+            nesting=['chart']
+        )
+
+        blocks = seq.to_dict()['components']
+        self.assertEqual(len(blocks), 2)
+        self.assertEqual(blocks[1]['numSamples'], 2)
+        self.assertEqual(blocks[1]['components'][:2], [
+            'trial__chart:pie_size:1_color:red', 'trial__chart:pie_size:1_color:blue'
+        ])
+        self.assertEqual(len(seq.get_components()), 8)
+        self.assertEqual(
+            seq.get_component('trial__chart:pie_size:2_color:blue').root.meta,
+            {'chart': 'pie', 'size': 2, 'color': 'blue'}
+        )
+
+        with self.assertRaises(rvt.RevisitError):
+            seq.factorial({'size': [1]}, order='fixed', nesting=['chart'])
+
+    def test_naming(self):
+        base = rvt.component(type='markdown', path='one.md', meta={'task': 'a'}, component_name__='trial')
+        factors = {'size': [1, 2], 'color': ['red', 'blue']}
+
+        hashed = rvt.sequence(order='fixed', components=[base]).factorial(factors, order='fixed', naming='hash')
+        hashed_again = rvt.sequence(order='fixed', components=[base]).factorial(factors, order='fixed', naming='hash')
+        self.assertEqual(hashed.root.components, hashed_again.root.components)
+        self.assertEqual(len(set(hashed.root.components)), 4)
+        self.assertTrue(all(len(name) == len('trial__') + 12 for name in hashed.root.components))
+
+        indexed = rvt.sequence(order='fixed', components=[base]).from_data(
+            iter([{'id': [1, 2]}, {'id': [3]}]), naming='index'
+        )
+        self.assertEqual(indexed.root.components, ['trial_0', 'trial_1', 'trial_2'])
+
+        table = hashed.lookup_table()
+        self.assertEqual(
+            table.loc[hashed.root.components[3]].to_dict(),
+            {'task': 'a', 'size': 2, 'color': 'blue'}
+        )
+        with self.assertRaises(rvt.RevisitError):
+            hashed.permute(factors=[{'size': 1}], order='fixed', naming='short')
+
+    def test_parallel_component_function(self):
+        def rename(size, component__):
+            return component__.clone(f"{component__.component_name__}_mapped")
+
+        results = []
+        for kwargs in [{}, {'workers': 4}]:
+            base = rvt.component(type='markdown', path='one.md', component_name__='trial')
+            seq = rvt.sequence(order='fixed', components=[base])
+            seq.permute(factors=[{'size': i} for i in range(20)], order='random')
+            results.append(seq.component(rename, **kwargs).to_dict())
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[1]['components'][:2], ['trial__size:0_mapped', 'trial__size:1_mapped'])
+        with self.assertRaises(rvt.RevisitError):
+            seq.component(rename, workers=2, executor='cluster')
+        with self.assertRaises(rvt.RevisitError):
+            seq.component(42)
+
+    def test_memoized_component_function(self):
+        calls = []
+
+        def stimulus(size):
+            calls.append(size)
+            return rvt.component(type='markdown', path=f'{size}.md', component_name__=f'stimulus_{size}')
+
+        comp_one = rvt.component(type='markdown', path='one.md', component_name__='one')
+        comp_two = rvt.component(type='markdown', path='two.md', component_name__='two')
+        seq = rvt.sequence(order='fixed', components=[comp_one, comp_two])
+        seq.permute(factors=[{'size': 1}, {'size': 2}, {'size': 3}], order='random')
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            seq.component(stimulus, cache_size=None, report=True)
+
+        self.assertEqual(calls, [1, 2, 3])
+        self.assertIn('50.0% cache hit rate (3 hits, 3 misses)', output.getvalue())
+        self.assertEqual(seq.to_dict()['components'][1]['components'], ['stimulus_1', 'stimulus_2', 'stimulus_3'])
+
+    def test_from_data_columns(self):
+        base = rvt.component(type='markdown', path='one.md', meta={'task': 'a'}, component_name__='trial')
+        columns = {'id': [1, 2], 'cond': ['x', 'y']}
+
+        DataRow = make_dataclass('DataRow', ['id', 'cond'])
+        rows = [DataRow(id=1, cond='x'), DataRow(id=2, cond='y')]
+
+        from_columns = rvt.sequence(order='fixed', components=[base]).from_data(columns)
+        from_frame = rvt.sequence(order='fixed', components=[base]).from_data(pd.DataFrame(columns))
+        from_rows = rvt.sequence(order='fixed', components=[base]).from_data(rows)
+
+        self.assertEqual(from_rows.root.components, ['trial_id:1_cond:x', 'trial_id:2_cond:y'])
+        self.assertEqual(from_columns.to_dict(), from_rows.to_dict())
+        self.assertEqual(from_frame.to_dict(), from_rows.to_dict())
+        self.assertEqual(
+            from_frame.get_component('trial_id:2_cond:y').root.meta,
+            {'task': 'a', 'id': 2, 'cond': 'y'}
+        )
+
+    def test_duplicate_component_names(self):
+        comp_one = rvt.component(type='markdown', path='one.md', component_name__='one')
+        same_comp = rvt.component(type='markdown', path='one.md', component_name__='one')
+        other_comp = rvt.component(type='markdown', path='other.md', component_name__='one')
+
+        # Repeating a component is allowed
+        seq = rvt.sequence(order='fixed', components=[comp_one, comp_one, same_comp])
+        self.assertEqual(seq.root.components, ['one', 'one', 'one'])
+
+        with self.assertRaises(rvt.RevisitError):
+            seq + other_comp
+
+        # A conflicting block is rejected without indexing any of its components
+        new_comp = rvt.component(type='markdown', path='two.md', component_name__='two')
+        block = rvt.sequence(order='fixed', components=[new_comp, other_comp])
+        with self.assertRaises(rvt.RevisitError):
+            seq + block
+        self.assertIsNone(seq.get_component('two'))
+        self.assertEqual(len(seq.get_components()), 3)
+
+
+class TestWidget(unittest.TestCase):
+    def make_study(self, paths):
+        components = [
+            rvt.component(type='markdown', path=path, component_name__=f'comp_{i}')
+            for i, path in enumerate(paths)
+        ]
+        return rvt.studyConfig(
+            schema='schema',
+            studyMetadata=rvt.studyMetadata(
+                title='Title', version='1', authors=['Author'], date='2025-01-01',
+                description='Description', organizations=['Organization']
+            ),
+            uiConfig=rvt.uiConfig(
+                contactEmail='test@test.com', logoPath=paths[0], withProgressBar=True, withSidebar=True
+            ),
+            sequence=rvt.sequence(order='fixed', components=components)
+        )
+
+    def staged_path(self, widget):
+        return os.path.join(self.revisit_path, 'public', widget.config['uiConfig']['logoPath'])
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.revisit_path = os.path.join(self.temp_dir, 'revisit')
+        os.makedirs(self.revisit_path)
+        self.asset_path = os.path.join(self.temp_dir, 'one.md')
+        with open(self.asset_path, 'w') as f:
+            f.write('# One')
+
+    def test_asset_cache(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            rvt.widget(self.make_study([self.asset_path, self.asset_path]), revisitPath=self.revisit_path)
+            rvt.widget(self.make_study([self.asset_path]), revisitPath=self.revisit_path)
+        self.assertIn('Copied 1 files (5 bytes), skipped 0 unchanged files (0 bytes).', output.getvalue())
+        self.assertIn('Copied 0 files (0 bytes), skipped 1 unchanged files (5 bytes).', output.getvalue())
+
+        # The manifest lists local paths, so it is kept out of the served folder
+        served = os.path.join(self.revisit_path, 'public', '__revisit-widget', 'assets')
+        self.assertEqual(len(os.listdir(served)), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.revisit_path, '.revisit-widget', 'asset-manifest.json')))
+
+        # Changed sources are copied again
+        with open(self.asset_path, 'w') as f:
+            f.write('# Changed')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            w = rvt.widget(self.make_study([self.asset_path]), revisitPath=self.revisit_path)
+        self.assertIn('Copied 1 files (9 bytes)', output.getvalue())
+        with open(self.staged_path(w)) as f:
+            self.assertEqual(f.read(), '# Changed')
+
+    def test_asset_link_modes(self):
+        for link_mode in ['symlink', 'hardlink', 'copy']:
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                w = rvt.widget(self.make_study([self.asset_path]), revisitPath=self.revisit_path, link_mode=link_mode, workers=2)
+            staged_path = self.staged_path(w)
+            self.assertEqual(os.path.islink(staged_path), link_mode == 'symlink')
+            self.assertEqual(os.path.samefile(staged_path, self.asset_path), link_mode != 'copy')
+            if link_mode != 'copy':
+                self.assertIn('Copied 0 files (0 bytes), linked 1 files (5 bytes)', output.getvalue())
+
+        # Hard links that fall back to copying are reported as copies
+        with open(self.asset_path, 'w') as f:
+            f.write('# Two')
+        with contextlib.redirect_stdout(io.StringIO()) as output, \
+                unittest.mock.patch.object(rvt.os, 'link', side_effect=OSError):
+            rvt.widget(self.make_study([self.asset_path]), revisitPath=self.revisit_path, link_mode='hardlink')
+        self.assertIn('Copied 1 files (5 bytes), linked 0 files (0 bytes)', output.getvalue())
+        with open(self.asset_path, 'w') as f:
+            f.write('# One')
+
+        # Copying replaced the link instead of writing through it
+        with open(self.asset_path) as f:
+            self.assertEqual(f.read(), '# One')
+        with self.assertRaises(rvt.RevisitError):
+            rvt.widget(self.make_study([self.asset_path]), revisitPath=self.revisit_path, link_mode='reflink')
+
+    def test_asset_destinations(self):
+        other_dir = os.path.join(self.temp_dir, 'other')
+        os.makedirs(other_dir)
+        other_path = os.path.join(other_dir, 'one.md')
+        with open(other_path, 'w') as f:
+            f.write('# Other')
+
+        study = self.make_study([self.asset_path, other_path, self.asset_path])
+        with contextlib.redirect_stdout(io.StringIO()):
+            w = rvt.widget(study, revisitPath=self.revisit_path)
+        paths = [w.config['components'][f'comp_{i}']['path'] for i in range(3)]
+
+        # Files with the same name get their own destinations, shared files one
+        self.assertNotEqual(paths[0], paths[1])
+        self.assertEqual(paths[0], paths[2])
+        self.assertEqual(paths[0], w.config['uiConfig']['logoPath'])
+        self.assertTrue(paths[1].endswith('-one.md'))
+        with open(os.path.join(self.revisit_path, 'public', paths[1])) as f:
+            self.assertEqual(f.read(), '# Other')
+
+        # Repeated previews reuse the same destinations
+        with contextlib.redirect_stdout(io.StringIO()):
+            w = rvt.widget(study, revisitPath=self.revisit_path)
+        self.assertEqual(w.config['components']['comp_1']['path'], paths[1])
+
+    def test_widget_does_not_modify_study(self):
+        study = self.make_study([self.asset_path, self.asset_path])
+        before = study.to_dict()
+        with contextlib.redirect_stdout(io.StringIO()):
+            first = rvt.widget(study, revisitPath=self.revisit_path)
+            second = rvt.widget(study, revisitPath=self.revisit_path)
+
+        self.assertEqual(study.to_dict(), before)
+        self.assertEqual(first.config, second.config)
+        self.assertTrue(first.config['components']['comp_0']['path'].startswith('__revisit-widget/assets/'))
+
+        # Edits made between previews are picked up
+        study.root.uiConfig.logoPath = os.path.join(self.temp_dir, 'logo.svg')
+        with open(study.root.uiConfig.logoPath, 'w') as f:
+            f.write('<svg/>')
+        with contextlib.redirect_stdout(io.StringIO()):
+            third = rvt.widget(study, revisitPath=self.revisit_path)
+        self.assertTrue(third.config['uiConfig']['logoPath'].endswith('-logo.svg'))
+
+        # New references are staged too
+        help_path = os.path.join(self.temp_dir, 'help.md')
+        with open(help_path, 'w') as f:
+            f.write('# Help')
+        study.root.uiConfig.helpTextPath = help_path
+        with contextlib.redirect_stdout(io.StringIO()):
+            fourth = rvt.widget(study, revisitPath=self.revisit_path)
+        staged_help = fourth.config['uiConfig']['helpTextPath']
+        self.assertTrue(staged_help.startswith('__revisit-widget/assets/'))
+        self.assertTrue(os.path.exists(os.path.join(self.revisit_path, 'public', staged_help)))
+
+    def test_update_study(self):
+        study = self.make_study([self.asset_path])
+        with contextlib.redirect_stdout(io.StringIO()):
+            w = rvt.widget(study, revisitPath=self.revisit_path)
+            study.root.studyMetadata.title = 'New/Title'
+            patch = w.update_study(study)
+
+        self.assertEqual(patch, [{'op': 'replace', 'path': '/studyMetadata/title', 'value': 'New/Title'}])
+        self.assertEqual(w.config['studyMetadata']['title'], 'New/Title')
+        self.assertEqual(w.config['components']['comp_0']['path'], w.config['uiConfig']['logoPath'])
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(w.update_study(study), [])
+
+        # Values equal in Python but not in JSON are still replaced
+        self.assertEqual(
+            rvt._widget._json_patch({'a': 1, 'b': [0, 2.0]}, {'a': True, 'b': [False, 2]}),
+            [
+                {'op': 'replace', 'path': '/b/1', 'value': 2},
+                {'op': 'replace', 'path': '/b/0', 'value': False},
+                {'op': 'replace', 'path': '/a', 'value': True},
+            ]
+        )
+
+
 class TestConfigGeneration(unittest.TestCase):
     def test_generated_config_matches_json(self):
         # Load the reference config
@@ -106,5 +809,47 @@ class TestConfigGeneration(unittest.TestCase):
         self.assertEqual(generated_json["components"], reference_config["components"])
         self.assertEqual(generated_json["sequence"], reference_config["sequence"])
 
+        # Streamed output matches the in-memory serialization
+        for indent in [None, 4]:
+            buffer = io.StringIO()
+            study_config.write(buffer, indent=indent)
+            self.assertEqual(buffer.getvalue(), study_config.to_json(indent=indent))
+
+        # Non-ASCII component names are streamed unescaped, like to_json()
+        unicode_config = rvt.studyConfig(
+            schema=reference_config["$schema"],
+            studyMetadata=study_metadata,
+            uiConfig=ui_config,
+            sequence=rvt.sequence(
+                order='fixed',
+                components=[rvt.component(type='markdown', path='café.md', component_name__='café')]
+            )
+        )
+        for indent in [None, 4]:
+            buffer = io.StringIO()
+            unicode_config.write(buffer, indent=indent)
+            self.assertEqual(buffer.getvalue(), unicode_config.to_json(indent=indent))
+            self.assertIn('"café"', buffer.getvalue())
+
+        # Inherited output expands to the same components
+        deduped_config = rvt.studyConfig(
+            schema=reference_config["$schema"],
+            studyMetadata=study_metadata,
+            uiConfig=ui_config,
+            importedLibraries=reference_config["importedLibraries"],
+            components=list(components.values()),
+            sequence=sequence,
+            dedupe='inherit'
+        ).to_dict()
+        base_components = deduped_config.get("baseComponents", {})
+        for name, comp in deduped_config["components"].items():
+            base = base_components.get(comp.get("baseComponent"), {})
+            expanded = {**base, **{k: v for k, v in comp.items() if k != "baseComponent"}}
+            self.assertEqual(expanded, generated_json["components"][name])
+
+        compressed = io.BytesIO()
+        study_config.write(compressed, compress=True)
+        self.assertEqual(json.loads(gzip.decompress(compressed.getvalue())), generated_json)
+
 if __name__ == "__main__":
     unittest.main()